@@ -0,0 +1,82 @@
+"""Micro-benchmark: leaf-block detail extractor vs. the previous BeautifulSoup substring de-duplication.
+
+Usage:
+    python -m benchmarks.bench_detail_extractor [recorded_details_page.html ...] [--repeat N]
+
+Without arguments it runs against synthetic Procurement_Details.aspx pages with 6, 30 and 80 paragraphs.
+Outputs are not expected to match: the new extractor drops nested repeats and moves labelled fields out of
+the description, so the benchmark also reports how much shorter the description gets.
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List, Optional
+from bs4 import BeautifulSoup
+from src.adapters.scraper.detail_extractor import extract_details
+from .synthetic import build_detail_page
+
+
+# Reference copy of EMarketplaceScraper._extract_description before the leaf-block extractor.
+def legacy_extract_description(html: str) -> Optional[str]:
+    soup = BeautifulSoup(html, "lxml")
+    main = soup.find(id="MainBody") or soup
+    paragraphs = main.find_all(["p", "div", "td"])[:80]
+    text_parts = []
+    seen = set()
+    for p in paragraphs:
+        txt = p.get_text(" ", strip=True)
+        if not txt or len(txt) <= 40:
+            continue
+        if txt in seen:
+            continue
+        if any(txt in prev or prev in txt for prev in text_parts):
+            continue
+        seen.add(txt)
+        text_parts.append(txt)
+    return "\n".join(text_parts) if text_parts else None
+
+
+def leaf_block_extract(html: str) -> Optional[str]:
+    return extract_details(html).description
+
+
+def _time(fn: Callable[[str], object], pages: List[str], repeat: int) -> List[float]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for html in pages:
+            fn(html)
+        samples.append((time.perf_counter() - t0) / len(pages))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help="Recorded Procurement_Details.aspx pages")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = []
+        for path in args.pages:
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append(f.read())
+    else:
+        pages = [build_detail_page(i, extra_paragraphs=n) for i, n in ((1, 6), (2, 30), (3, 80))]
+
+    legacy_chars = sum(len(legacy_extract_description(h) or "") for h in pages)
+    new_chars = sum(len(leaf_block_extract(h) or "") for h in pages)
+    fields = extract_details(pages[0])
+    print(f"[bench] {len(pages)} page(s), avg size {sum(len(h) for h in pages) // len(pages):,} chars")
+    print(f"[bench] description chars: legacy {legacy_chars:,}, leaf-block {new_chars:,} ({1 - new_chars / (legacy_chars or 1):.0%} shorter)")
+    print(f"[bench] structured fields on first page: {fields.solicitation_number} | {fields.due_date} | {fields.contact} | {fields.estimated_value}")
+
+    legacy = _time(legacy_extract_description, pages, args.repeat)
+    leaf = _time(leaf_block_extract, pages, args.repeat)
+    for name, samples in (("legacy bs4", legacy), ("leaf-block lxml", leaf)):
+        print(f"[bench] {name:>15}: median {statistics.median(samples) * 1000:.2f} ms/page, min {min(samples) * 1000:.2f} ms/page")
+    print(f"[bench] speedup: {statistics.median(legacy) / statistics.median(leaf):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
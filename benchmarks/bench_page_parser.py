@@ -0,0 +1,138 @@
+"""Micro-benchmark: single-pass lxml page parser vs. the previous three-pass BeautifulSoup parsing.
+
+Usage:
+    python -m benchmarks.bench_page_parser [recorded_page.html ...] [--repeat N]
+
+Without arguments it runs against synthetic results pages shaped like Procurement.aspx
+(20 rows, pager, ~60KB __VIEWSTATE).
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List, Set, Tuple
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from src.adapters.scraper.page_parser import GRID_ID_HTML, parse_results_page
+from src.domain.models import Listing
+from .synthetic import build_results_page
+
+BASE_URL = "https://www.emarketplace.state.pa.us/Procurement.aspx"
+
+
+# Reference copies of the BeautifulSoup functions the scraper used before the single-pass parser.
+def legacy_parse_listings(html: str) -> List[Listing]:
+    soup = BeautifulSoup(html, "lxml")
+    table = soup.find("table", id=GRID_ID_HTML)
+    if not table:
+        return []
+    listings: List[Listing] = []
+    for row in table.find_all("tr"):
+        cells = row.find_all("td")
+        if len(cells) < 6:
+            continue
+        link = cells[1].find("a")
+        if not link:
+            continue
+        detail_href = link.get("href")
+        if not detail_href or detail_href.startswith("javascript:"):
+            continue
+        if "Procurement_Details.aspx?id=" not in detail_href:
+            continue
+        listings.append(
+            Listing(
+                id=cells[0].get_text(strip=True),
+                title=link.get_text(strip=True),
+                agency=cells[2].get_text(strip=True),
+                category=cells[3].get_text(strip=True),
+                status=cells[5].get_text(strip=True),
+                detail_url=urljoin(BASE_URL, detail_href),
+            )
+        )
+    return listings
+
+
+def legacy_extract_form_fields(html: str) -> Dict[str, str]:
+    soup = BeautifulSoup(html, "lxml")
+    fields: Dict[str, str] = {}
+    for name in ["__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION", "__VIEWSTATEENCRYPTED"]:
+        el = soup.find("input", attrs={"name": name})
+        if el and el.has_attr("value"):
+            fields[name] = el.get("value", "")
+    for inp in soup.find_all("input", attrs={"type": "hidden"}):
+        name = inp.get("name")
+        if name and name not in fields:
+            fields[name] = inp.get("value", "")
+    return fields
+
+
+def legacy_find_pager_pages(html: str) -> Tuple[int, Set[int]]:
+    soup = BeautifulSoup(html, "lxml")
+    pages: Set[int] = set()
+    current = 1
+    pager_row = soup.find("tr", class_="GridPager")
+    if not pager_row:
+        return current, pages
+    for td in pager_row.find_all("td"):
+        span = td.find("span")
+        if span and span.get_text(strip=True).isdigit():
+            current = int(span.get_text(strip=True))
+        for a in td.find_all("a"):
+            text = a.get_text(strip=True)
+            if text.isdigit():
+                pages.add(int(text))
+    return current, pages
+
+
+def legacy_parse(html: str):
+    return legacy_parse_listings(html), legacy_find_pager_pages(html), legacy_extract_form_fields(html)
+
+
+def single_pass_parse(html: str):
+    return parse_results_page(html, BASE_URL)
+
+
+def check_equivalent(html: str) -> None:
+    listings, (current, pages), fields = legacy_parse(html)
+    parsed = single_pass_parse(html)
+    assert parsed.listings == listings, "listing rows differ"
+    assert parsed.current_page == current and set(parsed.pager_pages) == pages, "pager state differs"
+    assert parsed.form_fields == fields, "form fields differ"
+
+
+def _time(fn: Callable[[str], object], pages: List[str], repeat: int) -> List[float]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for html in pages:
+            fn(html)
+        samples.append((time.perf_counter() - t0) / len(pages))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help="Recorded Procurement.aspx results pages")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = []
+        for path in args.pages:
+            with open(path, "r", encoding="utf-8") as f:
+                pages.append(f.read())
+    else:
+        pages = [build_results_page(p, total_listings=400) for p in (1, 5, 12, 20)]
+
+    for html in pages:
+        check_equivalent(html)
+    print(f"[bench] {len(pages)} page(s), avg size {sum(len(h) for h in pages) // len(pages):,} chars; outputs match")
+
+    legacy = _time(legacy_parse, pages, args.repeat)
+    single = _time(single_pass_parse, pages, args.repeat)
+    for name, samples in (("legacy bs4 x3", legacy), ("single-pass lxml", single)):
+        print(f"[bench] {name:>16}: median {statistics.median(samples) * 1000:.2f} ms/page, min {min(samples) * 1000:.2f} ms/page")
+    print(f"[bench] speedup: {statistics.median(legacy) / statistics.median(single):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""End-to-end benchmark of SyncService.sync_once against the local stand-in portal.
+
+Usage:
+    python -m benchmarks.bench_sync [--sizes 100 1000 10000] [--latency-ms 0] [--out benchmarks/results/...json]
+
+For each listing count it starts benchmarks.stand_in_portal in a subprocess, runs one full sync with the real
+scraper and a fresh SQLite state, and fake classifier/notifier adapters with fixed latencies. It reports crawl
+pages/sec, per-stage latency percentiles and, in a second run, peak Python memory (tracemalloc). Results are
+written as JSON so runs can be compared over time.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from src.adapters.scraper.emarketplace_scraper import EMarketplaceScraper
+from src.adapters.state.sqlite_state_repo import SqliteStateRepository
+from src.application.service import SyncService
+from src.infrastructure.config import settings
+from .fakes import FakeClassifier, FakeNotifier, StageTimes, TimedScraper
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+@contextlib.contextmanager
+def stand_in_portal(listings: int, latency_ms: float, fixtures: Optional[str]):
+    cmd = [sys.executable, "-m", "benchmarks.stand_in_portal", "--listings", str(listings), "--latency-ms", str(latency_ms)]
+    if fixtures:
+        cmd += ["--fixtures", fixtures]
+    # A separate process keeps the server's CPU time and allocations out of the measurements
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert proc.stdout is not None
+        line = proc.stdout.readline().strip()
+        if not line.startswith("listening on "):
+            raise RuntimeError(f"stand-in portal did not start: {line!r}")
+        yield line[len("listening on "):]
+    finally:
+        if proc.stdin is not None:
+            proc.stdin.close()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+async def _sync(base_url: str, args: argparse.Namespace, times: StageTimes) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        state = SqliteStateRepository(os.path.join(tmp, "state.sqlite3"))
+        scraper = TimedScraper(EMarketplaceScraper(base_url=base_url), times)
+        classifier = FakeClassifier(times, latency_ms=args.classifier_latency_ms)
+        notifier = FakeNotifier(times, latency_ms=args.notifier_latency_ms)
+        service = SyncService(scraper, notifier, state, classifier)
+        started = time.perf_counter()
+        try:
+            if args.verbose:
+                await service.sync_once()
+            else:
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    await service.sync_once()
+        finally:
+            await scraper.aclose()
+        elapsed = time.perf_counter() - started
+        stored = state.count()
+        state.close()
+    crawl_secs = (scraper.last_page_at or started) - (scraper.first_page_at or started)
+    return {
+        "sync_s": elapsed,
+        "pages": scraper.pages,
+        "crawl_s": crawl_secs,
+        "pages_per_s": scraper.pages / crawl_secs if crawl_secs > 0 else None,
+        "listings_stored": stored,
+        "listings_per_s": stored / elapsed if elapsed > 0 else None,
+        "classifier_requests": classifier.requests,
+        "notified": notifier.sent,
+    }
+
+
+def run_size(listings: int, args: argparse.Namespace) -> Dict[str, Any]:
+    with stand_in_portal(listings, args.latency_ms, args.fixtures) as base_url:
+        times = StageTimes()
+        result = asyncio.run(_sync(base_url, args, times))
+        result["stages"] = times.summary()
+        if not args.skip_memory:
+            # tracemalloc slows allocation-heavy code, so memory is measured in a separate run
+            tracemalloc.start()
+            try:
+                asyncio.run(_sync(base_url, args, StageTimes()))
+                result["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            finally:
+                tracemalloc.stop()
+    result["listings"] = listings
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print(result: Dict[str, Any]) -> None:
+    line = f"[bench] {result['listings']:>6} listings: sync {result['sync_s']:.2f}s, {result['pages']} pages"
+    if result["pages_per_s"] is not None:
+        line += f" ({result['pages_per_s']:.1f} pages/s)"
+    if result["listings_per_s"] is not None:
+        line += f", {result['listings_per_s']:.0f} listings/s"
+    if "peak_memory_mb" in result:
+        line += f", peak {result['peak_memory_mb']:.1f} MiB"
+    print(line)
+    for stage, s in result["stages"].items():
+        print(f"[bench]        {stage:<15} n={s['count']:<6} p50 {s['p50_ms']:8.2f} ms  p90 {s['p90_ms']:8.2f} ms  p99 {s['p99_ms']:8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated portal latency per request")
+    parser.add_argument("--classifier-latency-ms", type=float, default=50.0)
+    parser.add_argument("--notifier-latency-ms", type=float, default=5.0)
+    parser.add_argument("--fixtures", default=None, help="Serve recorded pages from this directory where available")
+    parser.add_argument("--skip-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--out", default=None, help="JSON output path (default: benchmarks/results/sync-<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own logging")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    for size in args.sizes:
+        result = run_size(size, args)
+        _print(result)
+        results.append(result)
+
+    now = datetime.now(timezone.utc)
+    report = {
+        "benchmark": "sync_once",
+        "timestamp": now.isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "crawl_sessions": settings.crawl_sessions,
+            "enrich_concurrency": settings.enrich_concurrency,
+            "enrich_per_host_concurrency": settings.enrich_per_host_concurrency,
+            "classify_batch_size": settings.classify_batch_size,
+            "classify_concurrency": settings.classify_concurrency,
+            "pipeline_queue_size": settings.pipeline_queue_size,
+            "portal_latency_ms": args.latency_ms,
+            "classifier_latency_ms": args.classifier_latency_ms,
+            "notifier_latency_ms": args.notifier_latency_ms,
+        },
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"sync-{now.strftime('%Y%m%dT%H%M%SZ')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[bench] Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
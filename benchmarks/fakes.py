@@ -0,0 +1,128 @@
+"""Fake classifier/notifier adapters and a timing wrapper for the scraper, used by the sync benchmark."""
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional
+from src.domain.models import Listing
+from src.domain.ports import ClassifierPort, ListingsScraperPort, NotifierPort
+
+
+class StageTimes:
+    """Latency samples per pipeline stage, in seconds."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.samples[stage].append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {}
+        for stage, values in sorted(self.samples.items()):
+            ordered = sorted(values)
+            cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+            out[stage] = {
+                "count": len(ordered),
+                "p50_ms": cuts[49] * 1000,
+                "p90_ms": cuts[89] * 1000,
+                "p99_ms": cuts[98] * 1000,
+                "max_ms": ordered[-1] * 1000,
+                "total_s": sum(ordered),
+            }
+        return out
+
+
+class TimedScraper(ListingsScraperPort):
+    """Delegates to a real scraper and records how long each results page and enrichment batch took."""
+
+    def __init__(self, inner: ListingsScraperPort, times: StageTimes) -> None:
+        self._inner = inner
+        self._times = times
+        self.pages = 0
+        self.first_page_at: Optional[float] = None
+        self.last_page_at: Optional[float] = None
+
+    async def iter_listing_pages(self, full_sweep: bool = False) -> AsyncIterator[List[Listing]]:
+        pages = self._inner.iter_listing_pages(full_sweep=full_sweep)
+        try:
+            while True:
+                # Only the time spent producing the page counts, not the time the pipeline holds it
+                started = time.perf_counter()
+                try:
+                    page = await pages.__anext__()
+                except StopAsyncIteration:
+                    break
+                now = time.perf_counter()
+                self._times.record("crawl_page", now - started)
+                self.pages += 1
+                if self.first_page_at is None:
+                    self.first_page_at = started
+                self.last_page_at = now
+                yield page
+        finally:
+            await pages.aclose()
+
+    def source_count(self) -> int:
+        return self._inner.source_count()
+
+    def source_of(self, listing: Listing) -> str:
+        return self._inner.source_of(listing)
+
+    def stop_source(self, source: str) -> bool:
+        return self._inner.stop_source(source)
+
+    async def enrich_descriptions(self, listings: List[Listing]) -> List[Listing]:
+        started = time.perf_counter()
+        try:
+            return await self._inner.enrich_descriptions(listings)
+        finally:
+            if listings:
+                self._times.record("enrich_batch", time.perf_counter() - started)
+
+    def report_stats(self) -> None:
+        self._inner.report_stats()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class FakeClassifier(ClassifierPort):
+    """Keyword verdicts with a fixed simulated latency per batch request, standing in for OpenAI."""
+
+    KEYWORDS = ("software", "system", "cloud", "data", "application", "cyber")
+
+    def __init__(self, times: StageTimes, latency_ms: float = 50.0) -> None:
+        self._times = times
+        self._latency = latency_ms / 1000.0
+        self.requests = 0
+
+    async def classify(self, listing: Listing) -> Optional[bool]:
+        return (await self.classify_many([listing])).get(listing.id)
+
+    async def classify_many(self, listings: List[Listing]) -> Dict[str, Optional[bool]]:
+        started = time.perf_counter()
+        self.requests += 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        verdicts: Dict[str, Optional[bool]] = {
+            l.id: any(k in l.title.lower() for k in self.KEYWORDS) for l in listings
+        }
+        self._times.record("classify_batch", time.perf_counter() - started)
+        return verdicts
+
+
+class FakeNotifier(NotifierPort):
+    """Counts delivered listings with a fixed simulated latency per send, standing in for Discord."""
+
+    def __init__(self, times: StageTimes, latency_ms: float = 5.0) -> None:
+        self._times = times
+        self._latency = latency_ms / 1000.0
+        self.sent = 0
+
+    async def send_listings(self, listings: List[Listing]) -> None:
+        started = time.perf_counter()
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        self.sent += len(listings)
+        self._times.record("notify_batch", time.perf_counter() - started)
@@ -0,0 +1,61 @@
+"""Record real Procurement.aspx results pages and detail pages for offline benchmarks.
+
+Usage:
+    python -m benchmarks.record_fixtures [--pages 3] [--details 20] [--out benchmarks/fixtures]
+
+Walks the first --pages results pages through the ASP.NET postback pager (one session, in page order) and saves
+results_<page>.html plus detail_<id>.html for the first --details listings. The files feed
+benchmarks.stand_in_portal --fixtures, bench_page_parser and bench_detail_extractor.
+"""
+import argparse
+import os
+from typing import Dict, List
+import httpx
+from src.adapters.scraper.emarketplace_scraper import GRID_ID, HEADERS
+from src.adapters.scraper.page_parser import parse_results_page
+from src.domain.models import Listing
+from src.infrastructure.config import settings
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _save(out: str, name: str, html: str) -> None:
+    with open(os.path.join(out, name), "w", encoding="utf-8") as f:
+        f.write(html)
+    print(f"[record] {name} ({len(html):,} chars)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--details", type=int, default=20)
+    parser.add_argument("--out", default=FIXTURES_DIR)
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+
+    listings: List[Listing] = []
+    with httpx.Client(headers=HEADERS, timeout=30, follow_redirects=True) as client:
+        resp = client.get(settings.base_url)
+        resp.raise_for_status()
+        page = parse_results_page(resp.text, settings.base_url)
+        _save(args.out, f"results_{page.current_page}.html", resp.text)
+        listings.extend(page.listings)
+        for _ in range(args.pages - 1):
+            following = sorted(p for p in page.pager_pages | page.jump_pages if p > page.current_page)
+            if not following:
+                break
+            data: Dict[str, str] = dict(page.form_fields)
+            data.update({"__EVENTTARGET": GRID_ID, "__EVENTARGUMENT": f"Page${following[0]}"})
+            resp = client.post(settings.base_url, data=data)
+            resp.raise_for_status()
+            page = parse_results_page(resp.text, settings.base_url)
+            _save(args.out, f"results_{page.current_page}.html", resp.text)
+            listings.extend(page.listings)
+        for l in listings[:args.details]:
+            resp = client.get(l.detail_url)
+            resp.raise_for_status()
+            _save(args.out, f"detail_{l.id}.html", resp.text)
+
+
+if __name__ == "__main__":
+    main()
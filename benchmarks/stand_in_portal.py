@@ -0,0 +1,167 @@
+"""Local stand-in for the eMarketplace site: results grid with ASP.NET-style postback paging plus detail pages.
+
+Usage:
+    python -m benchmarks.stand_in_portal [--listings 1000] [--port 8089] [--latency-ms 0] [--fixtures DIR]
+
+Postbacks are checked like ASP.NET event validation: the posted __VIEWSTATE identifies the page it came from,
+and only the pages linked from that page's pager (numbers and "..." links) are accepted. Detail pages carry an
+ETag and answer If-None-Match with 304. With --fixtures, recorded pages (see benchmarks.record_fixtures) are
+served where they exist and synthetic pages fill the rest.
+"""
+import argparse
+import base64
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+from .synthetic import PAGER_WINDOW, build_detail_page, build_results_page, listing_id
+
+_ID_OFFSET = int(listing_id(0))
+
+
+class StandInPortal:
+    def __init__(self, total_listings: int, rows_per_page: int = 20, viewstate_bytes: int = 20_000,
+                 latency_ms: float = 0.0, fixtures_dir: Optional[str] = None) -> None:
+        self.total_listings = total_listings
+        self.rows_per_page = rows_per_page
+        self.viewstate_bytes = viewstate_bytes
+        self.latency = latency_ms / 1000.0
+        self.fixtures_dir = fixtures_dir
+        self.total_pages = max(1, (total_listings + rows_per_page - 1) // rows_per_page)
+        # The synthetic ViewState starts with sha256("viewstate-<page>"); map that seed back to the page
+        self._pages_by_seed: Dict[bytes, int] = {
+            hashlib.sha256(f"viewstate-{p}".encode()).digest(): p for p in range(1, self.total_pages + 1)
+        }
+
+    def _fixture(self, name: str) -> Optional[str]:
+        if not self.fixtures_dir:
+            return None
+        path = os.path.join(self.fixtures_dir, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def allowed_targets(self, page: int) -> Set[int]:
+        window_start = ((page - 1) // PAGER_WINDOW) * PAGER_WINDOW + 1
+        window_end = min(self.total_pages, window_start + PAGER_WINDOW - 1)
+        allowed = set(range(window_start, window_end + 1)) - {page}
+        if window_start > 1:
+            allowed.add(window_start - 1)
+        if window_end < self.total_pages:
+            allowed.add(window_end + 1)
+        return allowed
+
+    def source_page(self, viewstate: str) -> Optional[int]:
+        try:
+            seed = base64.b64decode(viewstate[:44])[:32]
+        except ValueError:
+            return None
+        return self._pages_by_seed.get(seed)
+
+    def results_page(self, page: int) -> str:
+        recorded = self._fixture(f"results_{page}.html")
+        if recorded is not None:
+            return recorded
+        return build_results_page(page, self.total_listings, rows_per_page=self.rows_per_page, viewstate_bytes=self.viewstate_bytes)
+
+    def detail_page(self, lid: str) -> str:
+        recorded = self._fixture(f"detail_{lid}.html")
+        if recorded is not None:
+            return recorded
+        return build_detail_page(int(lid) - _ID_OFFSET)
+
+    def handler(self) -> type:
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without TCP_NODELAY each response waits on a delayed ACK
+            disable_nagle_algorithm = True
+
+            def _send(self, status: int, body: str = "", headers: Optional[Dict[str, str]] = None) -> None:
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                if portal.latency:
+                    time.sleep(portal.latency)
+                url = urlsplit(self.path)
+                if url.path.endswith("Procurement_Details.aspx"):
+                    lid = (parse_qs(url.query).get("id") or [""])[0]
+                    if not lid.isdigit():
+                        self._send(404)
+                        return
+                    body = portal.detail_page(lid)
+                    etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:16] + '"'
+                    if self.headers.get("If-None-Match") == etag:
+                        self._send(304, headers={"ETag": etag})
+                        return
+                    self._send(200, body, {"ETag": etag})
+                    return
+                self._send(200, portal.results_page(1))
+
+            def do_POST(self) -> None:
+                if portal.latency:
+                    time.sleep(portal.latency)
+                length = int(self.headers.get("Content-Length", "0"))
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                match = re.fullmatch(r"Page\$(\d+)", (form.get("__EVENTARGUMENT") or [""])[0])
+                if not match:
+                    self._send(400)
+                    return
+                target = int(match.group(1))
+                source = portal.source_page((form.get("__VIEWSTATE") or [""])[0])
+                if portal.fixtures_dir is None and (source is None or target not in portal.allowed_targets(source)):
+                    # ASP.NET rejects events that were not rendered on the posted page
+                    self._send(500, "Invalid postback or callback argument.")
+                    return
+                self._send(200, portal.results_page(target))
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        return Handler
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer((host, port), self.handler())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=1000)
+    parser.add_argument("--rows-per-page", type=int, default=20)
+    parser.add_argument("--viewstate-bytes", type=int, default=20_000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fixtures", default=None, help="Directory of recorded results_<page>.html / detail_<id>.html")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+
+    portal = StandInPortal(args.listings, args.rows_per_page, args.viewstate_bytes, args.latency_ms, args.fixtures)
+    server = portal.serve(port=args.port)
+    # The benchmark runner reads this line to find the port
+    print(f"listening on http://127.0.0.1:{server.server_port}/Procurement.aspx", flush=True)
+    try:
+        for _ in sys.stdin:
+            pass
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Builders for synthetic eMarketplace pages that mirror the structure of the real ASP.NET grid."""
+import base64
+import hashlib
+from typing import Optional
+
+GRID_ID_HTML = "ctl00_MainBody_gdvSearchData"
+GRID_ID = "ctl00$MainBody$gdvSearchData"
+PAGER_WINDOW = 10
+
+AGENCIES = ["General Services", "Transportation", "Health", "Revenue", "Education", "Corrections"]
+CATEGORIES = ["IT", "IT Services", "Software", "Consulting"]
+STATUSES = ["Open", "Upcoming", "Closed"]
+TITLES = [
+    "Enterprise Case Management System Modernization",
+    "Janitorial Services for Regional Office",
+    "Cloud Data Platform and Analytics Services",
+    "Fleet Vehicle Maintenance",
+    "Mobile Application Development for Permits",
+    "Office Furniture Replacement",
+    "Cybersecurity Monitoring Software",
+    "Printing of Annual Reports",
+]
+
+
+def listing_id(index: int) -> str:
+    return f"{6100050000 + index}"
+
+
+def _viewstate(page: int, size: int) -> str:
+    seed = hashlib.sha256(f"viewstate-{page}".encode()).digest()
+    raw = (seed * (size // len(seed) + 1))[:size]
+    return base64.b64encode(raw).decode()
+
+
+def _pager_row(current: int, total_pages: int) -> str:
+    if total_pages <= 1:
+        return ""
+    window_start = ((current - 1) // PAGER_WINDOW) * PAGER_WINDOW + 1
+    window_end = min(total_pages, window_start + PAGER_WINDOW - 1)
+    cells = []
+    if window_start > 1:
+        cells.append(f"<td><a href=\"javascript:__doPostBack('{GRID_ID}','Page${window_start - 1}')\">...</a></td>")
+    for p in range(window_start, window_end + 1):
+        if p == current:
+            cells.append(f"<td><span>{p}</span></td>")
+        else:
+            cells.append(f"<td><a href=\"javascript:__doPostBack('{GRID_ID}','Page${p}')\">{p}</a></td>")
+    if window_end < total_pages:
+        cells.append(f"<td><a href=\"javascript:__doPostBack('{GRID_ID}','Page${window_end + 1}')\">...</a></td>")
+    return f"<tr class=\"GridPager\"><td colspan=\"6\"><table><tr>{''.join(cells)}</tr></table></td></tr>"
+
+
+def build_results_page(
+    page: int,
+    total_listings: int,
+    rows_per_page: int = 20,
+    viewstate_bytes: int = 60_000,
+    id_offset: int = 0,
+) -> str:
+    total_pages = max(1, (total_listings + rows_per_page - 1) // rows_per_page)
+    first = (page - 1) * rows_per_page
+    rows = []
+    for i in range(first, min(first + rows_per_page, total_listings)):
+        n = i + id_offset
+        lid = listing_id(n)
+        rows.append(
+            "<tr>"
+            f"<td>{lid}</td>"
+            f"<td><a href=\"Procurement_Details.aspx?id={lid}\">{TITLES[n % len(TITLES)]} #{n}</a></td>"
+            f"<td>{AGENCIES[n % len(AGENCIES)]}</td>"
+            f"<td>{CATEGORIES[n % len(CATEGORIES)]}</td>"
+            f"<td>01/{(n % 28) + 1:02d}/2026</td>"
+            f"<td>{STATUSES[n % len(STATUSES)]}</td>"
+            "</tr>"
+        )
+    return (
+        "<!DOCTYPE html><html><head><title>Procurement</title></head><body>"
+        "<form method=\"post\" action=\"./Procurement.aspx\" id=\"form1\">"
+        f"<input type=\"hidden\" name=\"__EVENTTARGET\" id=\"__EVENTTARGET\" value=\"\" />"
+        f"<input type=\"hidden\" name=\"__EVENTARGUMENT\" id=\"__EVENTARGUMENT\" value=\"\" />"
+        f"<input type=\"hidden\" name=\"__VIEWSTATE\" id=\"__VIEWSTATE\" value=\"{_viewstate(page, viewstate_bytes)}\" />"
+        "<input type=\"hidden\" name=\"__VIEWSTATEGENERATOR\" id=\"__VIEWSTATEGENERATOR\" value=\"A1B2C3D4\" />"
+        f"<input type=\"hidden\" name=\"__EVENTVALIDATION\" id=\"__EVENTVALIDATION\" value=\"{_viewstate(-page, 2_000)}\" />"
+        "<div id=\"MainBody\">"
+        f"<table id=\"{GRID_ID_HTML}\" class=\"Grid\">"
+        "<tr><th>Solicitation #</th><th>Title</th><th>Agency</th><th>Category</th><th>Due Date</th><th>Status</th></tr>"
+        f"{''.join(rows)}"
+        f"{_pager_row(page, total_pages)}"
+        "</table></div></form></body></html>"
+    )
+
+
+def build_detail_page(index: int, extra_paragraphs: int = 6, body: Optional[str] = None) -> str:
+    lid = listing_id(index)
+    title = TITLES[index % len(TITLES)]
+    paragraphs = body or "".join(
+        f"<p>Section {k}: The Commonwealth seeks a qualified vendor to deliver {title.lower()} "
+        f"including requirements analysis, implementation, testing and ongoing support for solicitation {lid}.</p>"
+        for k in range(extra_paragraphs)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Procurement Details</title></head><body>"
+        "<div id=\"MainBody\"><table><tr><td><div>"
+        f"<table>"
+        f"<tr><td>Solicitation Number:</td><td>{lid}</td></tr>"
+        f"<tr><td>Solicitation Due Date:</td><td>02/{(index % 28) + 1:02d}/2026 01:00 PM</td></tr>"
+        f"<tr><td>Contact:</td><td>Jane Buyer, jbuyer@example.gov, 717-555-0100</td></tr>"
+        f"<tr><td>Estimated Value:</td><td>${(index % 50 + 1) * 25_000:,}</td></tr>"
+        "</table>"
+        f"<div><p>Title: {title}</p>{paragraphs}</div>"
+        "</div></td></tr></table></div></body></html>"
+    )
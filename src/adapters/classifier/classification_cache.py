@@ -0,0 +1,152 @@
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional
+from ...domain.models import Listing
+from ...domain.ports import ClassifierPort
+from ...infrastructure.metrics import metrics
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "..", "data", "classifier_cache.sqlite3")
+CACHE_PATH = os.path.abspath(CACHE_PATH)
+
+_WS = re.compile(r"\s+")
+
+
+def _normalize(text: Optional[str]) -> str:
+    return _WS.sub(" ", (text or "").strip().lower())
+
+
+def content_key(listing: Listing, model: str, prompt_version: str) -> str:
+    content = f"{_normalize(listing.title)}\x1f{_normalize(listing.description)}"
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{model}:{prompt_version}:{digest}"
+
+
+class ClassificationCache:
+    """Disk-backed verdict cache with TTL expiry and least-recently-used eviction past max_entries."""
+
+    def __init__(self, path: str = CACHE_PATH, ttl_seconds: float = 90 * 86400, max_entries: int = 50_000) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "key TEXT PRIMARY KEY, relevant INTEGER NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_verdicts_last_used ON verdicts(last_used)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_verdicts_created_at ON verdicts(created_at)")
+
+    def get(self, key: str) -> Optional[bool]:
+        now = time.time()
+        row = self._conn.execute("SELECT relevant, created_at FROM verdicts WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > self.ttl_seconds:
+            with self._conn:
+                self._conn.execute("DELETE FROM verdicts WHERE key = ?", (key,))
+            return None
+        with self._conn:
+            self._conn.execute("UPDATE verdicts SET last_used = ? WHERE key = ?", (now, key))
+        return bool(row[0])
+
+    def put(self, key: str, relevant: bool) -> None:
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO verdicts (key, relevant, created_at, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET relevant = excluded.relevant, created_at = excluded.created_at, last_used = excluded.last_used",
+                (key, int(relevant), now, now),
+            )
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used ones beyond max_entries."""
+        with self._conn:
+            expired = self._conn.execute("DELETE FROM verdicts WHERE created_at < ?", (time.time() - self.ttl_seconds,)).rowcount
+            excess = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0] - self.max_entries
+            evicted = 0
+            if excess > 0:
+                evicted = self._conn.execute(
+                    "DELETE FROM verdicts WHERE key IN (SELECT key FROM verdicts ORDER BY last_used ASC LIMIT ?)", (excess,)
+                ).rowcount
+        return expired + evicted
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachedClassifier(ClassifierPort):
+    """Answers repeated title/description pairs from ClassificationCache instead of calling the inner classifier."""
+
+    def __init__(self, inner: ClassifierPort, model: str, prompt_version: str, cache: Optional[ClassificationCache] = None) -> None:
+        self._inner = inner
+        self._model = model
+        self._prompt_version = prompt_version
+        self._cache = cache if cache is not None else ClassificationCache()
+        self.hits = 0
+        self.misses = 0
+
+    async def classify(self, listing: Listing) -> Optional[bool]:
+        key = content_key(listing, self._model, self._prompt_version)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            metrics.inc("classifier_cache_lookups", result="hit")
+            return cached
+        self.misses += 1
+        metrics.inc("classifier_cache_lookups", result="miss")
+        answer = await self._inner.classify(listing)
+        # Only definitive answers are cached; failures are retried on the next sync
+        if answer is not None:
+            self._cache.put(key, answer)
+        return answer
+
+    async def classify_many(self, listings: List[Listing]) -> Dict[str, Optional[bool]]:
+        results: Dict[str, Optional[bool]] = {}
+        misses: List[Listing] = []
+        keys: Dict[str, str] = {}
+        for l in listings:
+            key = content_key(l, self._model, self._prompt_version)
+            cached = self._cache.get(key)
+            if cached is None:
+                keys[l.id] = key
+                misses.append(l)
+            else:
+                results[l.id] = cached
+        self.hits += len(results)
+        self.misses += len(misses)
+        metrics.inc("classifier_cache_lookups", len(results), result="hit")
+        metrics.inc("classifier_cache_lookups", len(misses), result="miss")
+        if misses:
+            answers = await self._inner.classify_many(misses)
+            for l in misses:
+                answer = answers.get(l.id)
+                if answer is not None:
+                    self._cache.put(keys[l.id], answer)
+                results[l.id] = answer
+        return results
+
+    def label_source(self, listing_id: str) -> str:
+        return self._inner.label_source(listing_id)
+
+    def report_stats(self) -> None:
+        evicted = self._cache.evict()
+        total = self.hits + self.misses
+        ratio = (self.hits / total * 100) if total else 0.0
+        print(f"[classifier] Cache: {self.hits} hit(s), {self.misses} miss(es) ({ratio:.0f}% hit), {len(self._cache)} entries, {evicted} evicted")
+        self.hits = 0
+        self.misses = 0
+        self._inner.report_stats()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+        self._cache.close()
@@ -1,8 +1,13 @@
+import asyncio
+import hashlib
+import json
 import os
-from typing import Optional
+import random
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 from ...domain.models import Listing
 from ...domain.ports import ClassifierPort
+from ...infrastructure.metrics import metrics
 
 
 PROMPT = (
@@ -11,53 +16,155 @@ PROMPT = (
     "Return 'NO' for: physical goods/hardware-only, construction/facilities, janitorial, printing, furniture, uniforms, fleet/vehicles, food, or purely non-software staffing. If uncertain but plausibly software-related, prefer YES.\n"
     "Respond with exactly YES or NO.\n"
 )
+BATCH_PROMPT = (
+    "You will receive several listings, each introduced by its ID. Decide YES or NO for every listing independently "
+    "and return one result per ID.\n"
+)
+# Changes whenever the prompts change; part of the classification cache key
+PROMPT_VERSION = hashlib.sha256((PROMPT + BATCH_PROMPT).encode("utf-8")).hexdigest()[:16]
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "listing_verdicts",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "string"},
+                            "answer": {"type": "string", "enum": ["YES", "NO"]},
+                        },
+                        "required": ["id", "answer"],
+                        "additionalProperties": False,
+                    },
+                }
+            },
+            "required": ["results"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+
+def _max_tokens(listings: List[Listing]) -> int:
+    """Completion budget for one batch's verdicts.
+
+    Each result echoes its listing's id, and a namespaced id can be long, so the budget counts one token
+    per id character (an upper bound) plus the JSON around it and the answer.
+    """
+    return 20 + sum(len(l.id) + 15 for l in listings)
 
 
 class OpenAIClassifier(ClassifierPort):
-    def __init__(self) -> None:
+    def __init__(self, batch_size: int = 10, max_concurrency: int = 3, max_retries: int = 5) -> None:
         load_dotenv()
         # Lazy import to avoid hard dependency if not used
-        from openai import OpenAI  # type: ignore
+        from openai import AsyncOpenAI, APIStatusError, RateLimitError  # type: ignore
 
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY must be set")
-        self._client = OpenAI(api_key=api_key)
+        # Retries are handled here so rate-limit backoff is shared across concurrent batches
+        self._client = AsyncOpenAI(api_key=api_key, max_retries=0)
         self._model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        self._rate_limit_error = RateLimitError
+        self._status_error = APIStatusError
+        self._batch_size = max(1, batch_size)
+        self._max_retries = max(0, max_retries)
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+        self.requests = 0
 
-    async def is_relevant(self, listing: Listing) -> bool:
-        title = listing.title.strip()
-        desc = (listing.description or "").strip()
-        user = f"Title: {title}\nDescription: {desc}"
-        try:
-            # Use responses API; if not available in installed version, fall back to chat.completions
+    @property
+    def model(self) -> str:
+        return self._model
+
+    async def classify(self, listing: Listing) -> Optional[bool]:
+        return (await self.classify_many([listing])).get(listing.id)
+
+    def _format_batch(self, listings: List[Listing]) -> str:
+        parts = []
+        for l in listings:
+            title = l.title.strip()
+            desc = (l.description or "").strip()
+            parts.append(f"ID: {l.id}\nTitle: {title}\nDescription: {desc}")
+        return "\n\n---\n\n".join(parts)
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
             try:
-                result = self._client.responses.create(
-                    model=self._model,
-                    input=[
-                        {"role": "system", "content": PROMPT},
-                        {"role": "user", "content": user},
-                    ],
-                )
-                text: Optional[str] = None
-                if result and result.output and len(result.output) > 0:
-                    text = result.output[0].content[0].text  # type: ignore[attr-defined]
-                answer = (text or "").strip().upper()
-            except Exception:
-                chat = self._client.chat.completions.create(
-                    model=self._model,
-                    messages=[
-                        {"role": "system", "content": PROMPT},
-                        {"role": "user", "content": user},
-                    ],
-                    temperature=0,
-                    max_tokens=3,
+                return float(retry_after) + random.uniform(0, 0.5)
+            except ValueError:
+                pass
+        return min(60.0, 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def _request(self, listings: List[Listing]) -> Dict[str, bool]:
+        attempt = 0
+        while True:
+            try:
+                async with self._slots, metrics.span("llm_request"):
+                    self.requests += 1
+                    metrics.inc("llm_requests")
+                    chat = await self._client.chat.completions.create(
+                        model=self._model,
+                        messages=[
+                            {"role": "system", "content": PROMPT + BATCH_PROMPT},
+                            {"role": "user", "content": self._format_batch(listings)},
+                        ],
+                        temperature=0,
+                        response_format=RESPONSE_FORMAT,  # type: ignore[arg-type]
+                        max_tokens=_max_tokens(listings),
+                    )
+                usage = getattr(chat, "usage", None)
+                if usage is not None:
+                    metrics.inc("llm_tokens", usage.prompt_tokens or 0, kind="prompt")
+                    metrics.inc("llm_tokens", usage.completion_tokens or 0, kind="completion")
+                payload = json.loads(chat.choices[0].message.content or "{}")
+                return {
+                    str(r["id"]): str(r["answer"]).strip().upper().startswith("Y")
+                    for r in payload.get("results", [])
+                }
+            except Exception as e:
+                retryable = isinstance(e, self._rate_limit_error) or (
+                    isinstance(e, self._status_error) and getattr(e, "status_code", 0) >= 500
                 )
-                answer = (chat.choices[0].message.content or "").strip().upper()
-            return answer.startswith("Y")
+                if not retryable or attempt >= self._max_retries:
+                    metrics.inc("llm_errors")
+                    raise
+                metrics.inc("llm_retries", status=getattr(e, "status_code", "?"))
+                delay = self._retry_delay(attempt, e)
+                print(f"[classifier] OpenAI {getattr(e, 'status_code', '?')}; retrying batch of {len(listings)} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _classify_batch(self, listings: List[Listing]) -> Dict[str, Optional[bool]]:
+        try:
+            answers = await self._request(listings)
         except Exception as e:
             print(f"[classifier] OpenAI error: {e}")
-            # Fail open: consider relevant to avoid missing opportunities
-            return True
+            answers = {}
+        missing = [l.id for l in listings if l.id not in answers]
+        if missing and answers:
+            print(f"[classifier] No verdict returned for {len(missing)} listing(s): {missing[:5]}")
+        return {l.id: answers.get(l.id) for l in listings}
+
+    async def classify_many(self, listings: List[Listing]) -> Dict[str, Optional[bool]]:
+        batches = [listings[i:i + self._batch_size] for i in range(0, len(listings), self._batch_size)]
+        results: Dict[str, Optional[bool]] = {}
+        for verdicts in await asyncio.gather(*(self._classify_batch(b) for b in batches)):
+            results.update(verdicts)
+        return results
 
+    def report_stats(self) -> None:
+        print(f"[classifier] OpenAI requests this sync: {self.requests}")
+        self.requests = 0
 
+    async def aclose(self) -> None:
+        await self._client.close()
@@ -0,0 +1,319 @@
+import asyncio
+import math
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from ...domain.models import Listing
+from ...domain.ports import ClassifierPort
+from ...infrastructure.metrics import metrics
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or",
+    "that", "the", "this", "to", "with", "will", "all", "any", "its", "per", "shall", "may", "not",
+}
+
+# Weighted phrase rules mirroring the categories named in the classifier PROMPT.
+# Positive weights push toward YES, negative toward NO; title matches count double.
+RULES: Sequence[Tuple[str, float]] = (
+    (r"\bsoftware\b", 2.5),
+    (r"\bapplication development\b|\bapp development\b", 3.0),
+    (r"\bweb ?(site|application|portal|development)\b", 2.0),
+    (r"\bmobile app", 2.5),
+    (r"\bmoderni[sz]ation\b", 1.5),
+    (r"\b(systems? integration|integration services)\b", 2.0),
+    (r"\bapis?\b", 1.5),
+    (r"\b(etl|data warehouse|data platform|analytics|machine learning|artificial intelligence)\b", 2.0),
+    (r"\bcloud\b", 1.5),
+    (r"\bcyber ?security\b", 2.0),
+    (r"\b(devops|sre|saas|erp|crm)\b", 2.0),
+    (r"\bjanitorial\b|\bcustodial\b", -4.0),
+    (r"\bfurniture\b", -3.5),
+    (r"\buniforms?\b", -3.5),
+    (r"\b(fleet|vehicles?|trucks?|tires?)\b", -3.0),
+    (r"\b(construction|roofing|paving|demolition|renovation|masonry)\b", -3.5),
+    (r"\b(hvac|plumbing|electrical contractor|elevator)\b", -3.0),
+    (r"\b(food|catering|meals?|dietary)\b", -3.0),
+    (r"\bprinting\b", -3.0),
+    (r"\b(landscaping|snow removal|mowing|lawn)\b", -3.5),
+)
+_COMPILED_RULES = [(re.compile(pattern), weight) for pattern, weight in RULES]
+
+
+def _sigmoid(x: float) -> float:
+    if x < -30:
+        return 0.0
+    if x > 30:
+        return 1.0
+    return 1.0 / (1.0 + math.exp(-x))
+
+
+def rule_score(listing: Listing) -> float:
+    title = listing.title.lower()
+    body = (listing.description or "").lower()
+    score = 0.0
+    for pattern, weight in _COMPILED_RULES:
+        if pattern.search(title):
+            score += 2 * weight
+        elif pattern.search(body):
+            score += weight
+    return score
+
+
+def tokenize(listing: Listing) -> List[str]:
+    text = f"{listing.title} {listing.title} {(listing.description or '')[:4000]}".lower()
+    words = [w for w in _TOKEN.findall(text) if w not in _STOPWORDS and len(w) > 1]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class TfidfLogisticModel:
+    """Small TF-IDF + logistic regression model trained with SGD; pure Python, CPU only."""
+
+    def __init__(self, epochs: int = 8, learning_rate: float = 0.5, l2: float = 1e-4, min_df: int = 2) -> None:
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.min_df = min_df
+        self.idf: Dict[str, float] = {}
+        self.weights: Dict[str, float] = {}
+        self.bias = 0.0
+        # Corpus statistics kept so later examples can be folded in without a full refit
+        self.df: Counter = Counter()
+        self.n = 0
+        self.positives = 0
+
+    def _vector(self, listing: Listing) -> Dict[str, float]:
+        counts = Counter(t for t in tokenize(listing) if t in self.idf)
+        vec = {t: (1 + math.log(c)) * self.idf[t] for t, c in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {t: v / norm for t, v in vec.items()}
+
+    def _add_documents(self, listings: Sequence[Listing], labels: Sequence[bool]) -> None:
+        for l in listings:
+            self.df.update(set(tokenize(l)))
+        self.n += len(listings)
+        self.positives += sum(1 for y in labels if y)
+        self.idf = {t: math.log((1 + self.n) / (1 + c)) + 1 for t, c in self.df.items() if c >= self.min_df}
+
+    def _sgd(self, listings: Sequence[Listing], labels: Sequence[bool], epochs: range, seed: int) -> None:
+        vectors = [self._vector(l) for l in listings]
+        n, positives = self.n, self.positives
+        # Balance classes so a mostly-NO history does not drown out YES
+        weight_pos = n / (2 * positives) if positives else 1.0
+        weight_neg = n / (2 * (n - positives)) if n - positives else 1.0
+        order = list(range(len(listings)))
+        rng = random.Random(seed)
+        for epoch in epochs:
+            rng.shuffle(order)
+            rate = self.learning_rate / (1 + epoch)
+            for i in order:
+                vec, y = vectors[i], 1.0 if labels[i] else 0.0
+                z = self.bias + sum(self.weights.get(t, 0.0) * v for t, v in vec.items())
+                grad = (_sigmoid(z) - y) * (weight_pos if y else weight_neg)
+                self.bias -= rate * grad
+                for t, v in vec.items():
+                    w = self.weights.get(t, 0.0)
+                    self.weights[t] = w - rate * (grad * v + self.l2 * w)
+
+    def fit(self, listings: Sequence[Listing], labels: Sequence[bool], seed: int = 7) -> "TfidfLogisticModel":
+        self.df, self.n, self.positives = Counter(), 0, 0
+        self._add_documents(listings, labels)
+        self.weights = {}
+        self.bias = 0.0
+        self._sgd(listings, labels, range(self.epochs), seed)
+        return self
+
+    def partial_fit(self, listings: Sequence[Listing], labels: Sequence[bool], seed: int = 7) -> "TfidfLogisticModel":
+        """Fold new examples into a fitted model: update the IDF table and run SGD over the new examples only.
+
+        Continues at the end of the learning-rate schedule, so the new examples nudge the weights instead of
+        overriding what the earlier ones taught.
+        """
+        self._add_documents(listings, labels)
+        self._sgd(listings, labels, range(self.epochs, 2 * self.epochs), seed)
+        return self
+
+    def logit(self, listing: Listing) -> float:
+        return self.bias + sum(self.weights.get(t, 0.0) * v for t, v in self._vector(listing).items())
+
+
+@dataclass(frozen=True)
+class PrefilterDecision:
+    probability: float
+    verdict: Optional[bool]  # None = not confident enough, ask the LLM
+
+
+class Prefilter:
+    """Combines keyword rules with an optional model trained on past LLM labels."""
+
+    def __init__(self, yes_threshold: float = 0.97, no_threshold: float = 0.03, min_training: int = 50,
+                 refit_ratio: float = 0.25) -> None:
+        self.yes_threshold = yes_threshold
+        self.no_threshold = no_threshold
+        self.min_training = min_training
+        # Incremental updates drift from a full fit; refit once this share of the examples is new
+        self.refit_ratio = refit_ratio
+        self.model: Optional[TfidfLogisticModel] = None
+        self._trained: Dict[str, bool] = {}
+
+    def train(self, labelled: Sequence[Listing]) -> bool:
+        examples = [l for l in labelled if l.relevant is not None]
+        labels = [bool(l.relevant) for l in examples]
+        self._trained = {l.id: y for l, y in zip(examples, labels)}
+        if len(examples) < self.min_training or all(labels) or not any(labels):
+            self.model = None
+            return False
+        self.model = TfidfLogisticModel().fit(examples, labels)
+        return True
+
+    def update(self, labelled: Sequence[Listing]) -> Tuple[bool, int]:
+        """Bring the model up to date with the current labels; returns (model in use, examples trained on).
+
+        Only labels that were not seen before are trained on. A full refit happens when there is no model
+        yet, when a known label flipped or disappeared, or when the new labels outgrow refit_ratio.
+        """
+        examples = [l for l in labelled if l.relevant is not None]
+        fresh = [l for l in examples if l.id not in self._trained]
+        flipped = any(self._trained.get(l.id, bool(l.relevant)) != bool(l.relevant) for l in examples)
+        if (self.model is None or flipped or len(examples) - len(fresh) != len(self._trained)
+                or len(fresh) > self.refit_ratio * len(self._trained)):
+            return self.train(examples), len(examples)
+        if fresh:
+            labels = [bool(l.relevant) for l in fresh]
+            self.model.partial_fit(fresh, labels)
+            self._trained.update((l.id, y) for l, y in zip(fresh, labels))
+        return True, len(fresh)
+
+    def decide(self, listing: Listing) -> PrefilterDecision:
+        logit = rule_score(listing)
+        if self.model is not None:
+            logit += self.model.logit(listing)
+        p = _sigmoid(logit)
+        if p >= self.yes_threshold:
+            return PrefilterDecision(p, True)
+        if p <= self.no_threshold:
+            return PrefilterDecision(p, False)
+        return PrefilterDecision(p, None)
+
+
+class PrefilterClassifier(ClassifierPort):
+    """Decides obvious listings locally and forwards only low-confidence ones to the inner classifier."""
+
+    def __init__(self, inner: ClassifierPort, prefilter: Prefilter, load_training: Optional[Callable[[], List[Listing]]] = None,
+                 label_version: Optional[Callable[[], str]] = None) -> None:
+        self._inner = inner
+        self._prefilter = prefilter
+        self._load_training = load_training
+        self._label_version = label_version
+        self._version: Optional[str] = None
+        self._stale = load_training is not None
+        self._training = asyncio.Lock()
+        self._local: Dict[str, bool] = {}
+        self.local_yes = 0
+        self.local_no = 0
+        self.forwarded = 0
+
+    async def _ensure_trained(self) -> None:
+        async with self._training:
+            if not self._stale or self._load_training is None:
+                return
+            self._stale = False
+            version = self._label_version() if self._label_version is not None else None
+            if version is not None and version == self._version:
+                return
+            # Loading stays on the event loop (the state connection belongs to it); fitting runs in a worker thread
+            labelled = self._load_training()
+            started = time.monotonic()
+            fitted_before = self._prefilter.model is not None
+            in_use, trained = await asyncio.to_thread(self._prefilter.update, labelled)
+            self._version = version
+            took = time.monotonic() - started
+            if not in_use:
+                print(f"[prefilter] {len(labelled)} past LLM decisions; using keyword rules only.")
+            elif not fitted_before or trained == len(labelled):
+                print(f"[prefilter] Trained on {len(labelled)} past LLM decisions in {took:.2f}s.")
+            elif trained:
+                print(f"[prefilter] Added {trained} new LLM decision(s) to the model in {took:.2f}s ({len(labelled)} in total).")
+
+    async def classify(self, listing: Listing) -> Optional[bool]:
+        return (await self.classify_many([listing])).get(listing.id)
+
+    async def classify_many(self, listings: List[Listing]) -> Dict[str, Optional[bool]]:
+        await self._ensure_trained()
+        results: Dict[str, Optional[bool]] = {}
+        forward: List[Listing] = []
+        for l in listings:
+            verdict = self._prefilter.decide(l).verdict
+            if verdict is None:
+                forward.append(l)
+                self._local.pop(l.id, None)
+                continue
+            results[l.id] = verdict
+            self._local[l.id] = verdict
+            if verdict:
+                self.local_yes += 1
+            else:
+                self.local_no += 1
+        self.forwarded += len(forward)
+        metrics.inc("prefilter_decisions", len(listings) - len(forward), outcome="local")
+        metrics.inc("prefilter_decisions", len(forward), outcome="forwarded")
+        if forward:
+            results.update(await self._inner.classify_many(forward))
+        return results
+
+    def label_source(self, listing_id: str) -> str:
+        if listing_id in self._local:
+            return "prefilter"
+        return self._inner.label_source(listing_id)
+
+    def report_stats(self) -> None:
+        saved = self.local_yes + self.local_no
+        print(f"[prefilter] Decided {saved} locally ({self.local_yes} YES, {self.local_no} NO); {self.forwarded} sent on; saved {saved} LLM call(s)")
+        self.local_yes = self.local_no = self.forwarded = 0
+        self._local.clear()
+        # Pick up this sync's new LLM labels before the next one; unchanged labels skip training
+        self._stale = self._load_training is not None
+        self._inner.report_stats()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def evaluate(labelled: Sequence[Listing], prefilter: Prefilter, folds: int = 5, seed: int = 7) -> Dict[str, float]:
+    """K-fold evaluation of the pre-filter's local decisions against stored LLM labels."""
+    examples = [l for l in labelled if l.relevant is not None]
+    order = list(range(len(examples)))
+    random.Random(seed).shuffle(order)
+    tp = fp = fn = tn = abstain = 0
+    for k in range(folds):
+        test_idx = set(order[k::folds])
+        train = [examples[i] for i in order if i not in test_idx]
+        prefilter.train(train)
+        for i in test_idx:
+            truth = bool(examples[i].relevant)
+            verdict = prefilter.decide(examples[i]).verdict
+            if verdict is None:
+                abstain += 1
+            elif verdict and truth:
+                tp += 1
+            elif verdict and not truth:
+                fp += 1
+            elif not verdict and truth:
+                fn += 1
+            else:
+                tn += 1
+    decided = tp + fp + fn + tn
+    total = decided + abstain
+    return {
+        "examples": float(total),
+        "decided_locally": float(decided),
+        "coverage": decided / total if total else 0.0,
+        "yes_precision": tp / (tp + fp) if tp + fp else 0.0,
+        "no_precision": tn / (tn + fn) if tn + fn else 0.0,
+        # Abstentions go to the LLM, which is the reference, so only local NOs can lose relevant listings
+        "recall": 1 - (fn / (sum(1 for l in examples if l.relevant) or 1)),
+        "accuracy_when_decided": (tp + tn) / decided if decided else 0.0,
+    }
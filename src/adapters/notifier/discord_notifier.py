@@ -1,37 +1,97 @@
 import asyncio
+import io
 import os
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Set
 import discord
 from dotenv import load_dotenv
 from ...domain.models import Listing
+from ...domain.ports import NotifierPort, PartialDeliveryError
+from ...infrastructure.config import settings
+from ...infrastructure.metrics import metrics
+from .message_packing import EmbedSpec, PackedMessage, detail_summary, pack_embeds, pack_text, repost_tag
 
 # Ensure .env is loaded even if infrastructure.config isn't imported yet
 load_dotenv()
 
 
-class DiscordNotifier:
+def _error_of(future: "asyncio.Future[Any]") -> Optional[BaseException]:
+    return asyncio.CancelledError() if future.cancelled() else future.exception()
+
+
+def _maybe_posted(error: BaseException) -> bool:
+    """Whether a failed send could still have created the message; only a 4xx is a definite rejection."""
+    return not (isinstance(error, discord.HTTPException) and error.status < 500)
+
+
+class _Outcome:
+    """Which listings of one send_listings call were delivered, may have been, or were not."""
+
     def __init__(self) -> None:
+        self.delivered: Set[str] = set()
+        self.uncertain: Set[str] = set()
+        self.failed: Set[str] = set()
+        self.error: Optional[BaseException] = None
+
+    def settle(self, listings: Sequence[Listing], futures: Sequence["asyncio.Future[Any]"]) -> None:
+        errors = [e for e in map(_error_of, futures) if e is not None]
+        ids = {l.id for l in listings}
+        if not errors:
+            self.delivered |= ids
+            return
+        self.error = self.error or errors[0]
+        if len(errors) < len(futures) or any(_maybe_posted(e) for e in errors):
+            self.uncertain |= ids
+        else:
+            self.failed |= ids
+
+    def raise_if_failed(self, total: int) -> None:
+        if self.error is None:
+            return
+        raise PartialDeliveryError(
+            f"{len(self.failed) + len(self.uncertain)} of {total} listing(s) not confirmed as sent: {self.error}",
+            delivered=self.delivered, uncertain=self.uncertain,
+        ) from self.error
+
+
+class DiscordNotifier(NotifierPort):
+    """Keeps one gateway connection for the life of the process and sends through a single queue worker.
+
+    discord.py already paces requests per route using the X-RateLimit headers; the worker serialises
+    sends to the channel and waits out any 429 that still slips through before retrying.
+    """
+
+    def __init__(self, mode: str = settings.notify_mode, full_descriptions: str = settings.notify_full_descriptions,
+                 description_chars: int = settings.notify_description_chars, max_send_retries: int = 5) -> None:
+        self._mode = mode  # pack | embed | legacy
+        self._full_descriptions = full_descriptions  # attachment | thread | none
+        self._description_chars = description_chars
+        self._token: Optional[str] = None
+        self._guild_id: Optional[int] = None
+        self._channel_id: Optional[int] = None
+        self._client_task: Optional[asyncio.Task] = None
+        self._channel: Optional[Any] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._max_send_retries = max_send_retries
+        self._build_client()
+
+    def _build_client(self) -> None:
+        # A closed discord.Client cannot be restarted, so each start gets a fresh one
         intents = discord.Intents.none()
         intents.guilds = True
         intents.messages = True
         self.client = discord.Client(intents=intents)
         self._ready = asyncio.Event()
-        self._token: Optional[str] = None
-        self._guild_id: Optional[int] = None
-        self._channel_id: Optional[int] = None
-        self._client_task: Optional[asyncio.Task] = None
+        self._channel = None
 
         @self.client.event
         async def on_ready():
-            print(f"[discord] Logged in as {self.client.user}")
-            print("[discord] Guilds:")
-            for g in self.client.guilds:
-                print(f"  - {g.name} ({g.id})")
-                for c in g.text_channels:
-                    print(f"     # {c.name} ({c.id})")
+            print(f"[discord] Logged in as {self.client.user} ({len(self.client.guilds)} guild(s))")
             self._ready.set()
 
     def _load_env(self) -> None:
+        if self._token is not None and self._guild_id is not None and self._channel_id is not None:
+            return
         if self._token is None:
             self._token = os.getenv("DISCORD_TOKEN")
         if self._guild_id is None:
@@ -52,38 +112,111 @@ class DiscordNotifier:
         if not self._token or not self._guild_id or not self._channel_id:
             raise RuntimeError("DISCORD_TOKEN, DISCORD_GUILD_ID, DISCORD_CHANNEL_ID must be set")
         if self._client_task is None or self._client_task.done():
+            if self.client.is_closed():
+                self._build_client()
             print("[discord] Starting client in background…")
             self._client_task = asyncio.create_task(self.client.start(self._token))
-        await self._ready.wait()
+        if not self._ready.is_set():
+            ready = asyncio.create_task(self._ready.wait())
+            await asyncio.wait({ready, self._client_task}, return_when=asyncio.FIRST_COMPLETED)
+            if not ready.done():
+                ready.cancel()
+                # start() returned before on_ready: surface the login/connection error
+                error = self._client_task.exception() if not self._client_task.cancelled() else None
+                raise RuntimeError(f"Discord client stopped before becoming ready: {error}")
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._drain_queue())
+
+    async def _resolve_channel(self) -> Any:
+        if self._channel is not None:
+            return self._channel
+        guild = self.client.get_guild(self._guild_id) if self._guild_id else None
+        if guild is None:
+            print(f"[discord] get_guild({self._guild_id}) returned None; trying fetch_guild…")
+            guild = await self.client.fetch_guild(self._guild_id)
+        channel = guild.get_channel(self._channel_id) if guild else None
+        if channel is None:
+            print(f"[discord] channel not found in cache; trying fetch_channel({self._channel_id})…")
+            channel = await self.client.fetch_channel(self._channel_id)
+        print(f"[discord] Resolved channel #{getattr(channel, 'name', '?')} ({self._channel_id})")
+        self._channel = channel
+        return channel
+
+    async def _deliver(self, target: Optional[Any], kwargs: Dict[str, Any]) -> Any:
+        attempt = 0
+        while True:
+            try:
+                destination = target if target is not None else await self._resolve_channel()
+                files = kwargs.pop("files", None)
+                if files:
+                    # discord.File objects are consumed by a send; rebuild them for every attempt
+                    kwargs["files"] = [discord.File(io.BytesIO(data), filename=name) for name, data in files]
+                try:
+                    with metrics.span("discord_send"):
+                        message = await destination.send(**kwargs)
+                    metrics.inc("discord_messages")
+                    return message
+                finally:
+                    if files:
+                        kwargs["files"] = files
+            except (discord.NotFound, discord.Forbidden):
+                # Channel moved or permissions changed: resolve again next time
+                self._channel = None
+                raise
+            except discord.HTTPException as e:
+                # Only a rate limit is known not to have posted; retrying a 5xx could post the message twice
+                if attempt >= self._max_send_retries or e.status != 429:
+                    metrics.inc("discord_errors", status=e.status)
+                    raise
+                metrics.inc("discord_retries", status=e.status)
+                retry_after = getattr(e, "retry_after", None) or min(30.0, 2 ** attempt)
+                print(f"[discord] Send got HTTP {e.status}; retrying in {retry_after:.1f}s")
+                await asyncio.sleep(retry_after)
+                attempt += 1
+
+    async def _drain_queue(self) -> None:
+        assert self._queue is not None
+        while True:
+            target, kwargs, done = await self._queue.get()
+            try:
+                result = await self._deliver(target, kwargs)
+                if not done.done():
+                    done.set_result(result)
+            except Exception as e:
+                print(f"[discord] Error sending message: {e}")
+                if not done.done():
+                    done.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def _enqueue(self, target: Optional[Any] = None, **kwargs: Any) -> "asyncio.Future[Any]":
+        await self._ensure_started()
+        assert self._queue is not None
+        done: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self._queue.put((target, kwargs, done))
+        return done
+
+    async def _queue_text(self, content: str, target: Optional[Any] = None) -> List["asyncio.Future[Any]"]:
+        # Split into chunks of <= 1900 characters to stay under Discord's 2000 limit
+        chunks = self._split_into_chunks(content, 1900)
+        total = len(chunks)
+        pending = []
+        for idx, chunk in enumerate(chunks, 1):
+            prefix = "" if total == 1 else f"(part {idx}/{total})\n"
+            pending.append(await self._enqueue(target, content=prefix + chunk))
+        return pending
 
     async def _send_message(self, content: str) -> None:
-        await self._ready.wait()
-        try:
-            guild = self.client.get_guild(self._guild_id) if self._guild_id else None
-            if guild is None:
-                print(f"[discord] get_guild({self._guild_id}) returned None; trying fetch_guild…")
-                guild = await self.client.fetch_guild(self._guild_id)
-            channel = guild.get_channel(self._channel_id) if guild else None
-            if channel is None:
-                print(f"[discord] channel not found in cache; trying fetch_channel({self._channel_id})…")
-                channel = await self.client.fetch_channel(self._channel_id)
-            # Split into chunks of <= 1900 characters to stay under Discord's 2000 limit
-            chunks = self._split_into_chunks(content, 1900)
-            total = len(chunks)
-            for idx, chunk in enumerate(chunks, 1):
-                prefix = "" if total == 1 else f"(part {idx}/{total})\n"
-                body = prefix + chunk
-                print(f"[discord] Sending message to #{getattr(channel, 'name', '?')} ({self._channel_id})… chunk {idx}/{total} size={len(body)}")
-                await channel.send(body)
-            print("[discord] Message(s) sent.")
-        except Exception as e:
-            print(f"[discord] Error sending message: {e}")
-            raise
+        await asyncio.gather(*await self._queue_text(content))
 
     def _format_listing_header(self, l: Listing) -> str:
+        tag = repost_tag(l)
+        updated = f"**[{tag}]** " if tag else ""
+        details = detail_summary(l)
         return (
-            f"**{l.title}** (ID: {l.id})\n"
-            f"Agency: {l.agency} | Status: {l.status}\n"
+            f"{updated}**{l.title}** (ID: {l.id})\n"
+            f"Agency: {l.agency} | Status: {l.status}{' | ' + details if details else ''}\n"
             f"<{l.detail_url}>"
         )
 
@@ -105,26 +238,102 @@ class DiscordNotifier:
             remaining = remaining[cut:].lstrip("\n")
         return chunks
 
+    def _to_embed(self, spec: EmbedSpec) -> discord.Embed:
+        embed = discord.Embed(title=spec.title, url=spec.url, description=spec.description or None)
+        embed.set_footer(text=spec.footer)
+        return embed
+
+    def _full_text(self, listings: List[Listing]) -> str:
+        return "\n\n".join(
+            f"{l.title} (ID: {l.id})\n{l.detail_url}\n{detail_summary(l, with_contact=True)}\n\n{self._format_listing_description(l)}"
+            for l in listings
+            if self._format_listing_description(l)
+        )
+
+    def _message_kwargs(self, packed: PackedMessage, index: int) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {}
+        if packed.embeds:
+            kwargs["embeds"] = [self._to_embed(e) for e in packed.embeds]
+        else:
+            kwargs["content"] = packed.content
+        if self._full_descriptions == "attachment":
+            full = self._full_text(packed.listings)
+            if full:
+                kwargs["files"] = [(f"listings-{index}.txt", full.encode("utf-8"))]
+        return kwargs
+
+    async def _post_thread(self, message_future: "asyncio.Future[Any]", packed: PackedMessage) -> None:
+        message = await message_future
+        full = self._full_text(packed.listings)
+        if not full:
+            return
+        try:
+            name = packed.listings[0].title if len(packed.listings) == 1 else f"{len(packed.listings)} listings: full descriptions"
+            thread = await message.create_thread(name=name[:100])
+        except discord.HTTPException as e:
+            # Missing thread permissions: fall back to an attachment on the channel
+            print(f"[discord] Could not create thread ({e}); attaching descriptions instead")
+            await (await self._enqueue(files=[("descriptions.txt", full.encode("utf-8"))]))
+            return
+        await asyncio.gather(*await self._queue_text(full, target=thread))
+
+    async def _send_packed(self, listings: List[Listing], outcome: _Outcome) -> int:
+        if self._mode == "embed":
+            packed = pack_embeds(listings, self._description_chars)
+        else:
+            packed = pack_text(listings, self._format_listing_header, self._description_chars)
+        sent = []
+        threads = []
+        for index, message in enumerate(packed, 1):
+            future = await self._enqueue(**self._message_kwargs(message, index))
+            sent.append((message, future))
+            if self._full_descriptions == "thread":
+                threads.append(asyncio.ensure_future(self._post_thread(future, message)))
+        # Wait for every message, not just until the first failure, so the outcome of each one is known
+        await asyncio.gather(*(f for _, f in sent), *threads, return_exceptions=True)
+        for message, future in sent:
+            outcome.settle(message.listings, [future])
+        for thread, (_, future) in zip(threads, sent):
+            if _error_of(future) is None and _error_of(thread) is not None:
+                # The listings are posted; only their full descriptions are missing
+                print(f"[discord] Could not post full descriptions: {_error_of(thread)}")
+        return len(packed)
+
     async def send_listings(self, listings: List[Listing]) -> None:
         print(f"[discord] Preparing to send {len(listings)} listings…")
         await self._ensure_started()
+        outcome = _Outcome()
+        if self._mode in ("pack", "embed"):
+            messages = await self._send_packed(listings, outcome)
+            outcome.raise_if_failed(len(listings))
+            print(f"[discord] Sent {len(listings)} listing(s) in {messages} message(s).")
+            return
+        headers = []
+        descriptions = []
+        for l in listings:
+            # Queue everything up front; the worker delivers in order while we wait
+            headers.append(await self._queue_text(self._format_listing_header(l)))
+            desc = self._format_listing_description(l)
+            descriptions.extend(await self._queue_text(desc) if desc else [])
+        await asyncio.gather(*(f for group in headers for f in group), *descriptions, return_exceptions=True)
+        # The header carries the listing; a missing description part does not make it unsent
+        for l, group in zip(listings, headers):
+            outcome.settle([l], group)
+        outcome.raise_if_failed(len(listings))
+        print(f"[discord] Sent {len(listings)} listing(s).")
+
+    async def close(self) -> None:
+        print("[discord] Closing client…")
+        if self._worker is not None and not self._worker.done():
+            assert self._queue is not None
+            await self._queue.join()
+            self._worker.cancel()
+        self._worker = None
         try:
-            for i, l in enumerate(listings, 1):
-                print(f"[discord] ({i}/{len(listings)}) sending {l.id}…")
-                # Send header once
-                await self._send_message(self._format_listing_header(l))
-                # Then chunk only the description
-                desc = self._format_listing_description(l)
-                if desc:
-                    print(f"[discord] Sending description chunks for {l.id}…")
-                    await self._send_message(desc)
-        finally:
-            print("[discord] Closing client…")
-            try:
-                await self.client.close()
-            except Exception as e:
-                print(f"[discord] Error closing client: {e}")
-            await asyncio.sleep(0)
-            if self._client_task and not self._client_task.done():
-                self._client_task.cancel()
-                self._client_task = None
+            await self.client.close()
+        except Exception as e:
+            print(f"[discord] Error closing client: {e}")
+        await asyncio.sleep(0)
+        if self._client_task and not self._client_task.done():
+            self._client_task.cancel()
+        self._client_task = None
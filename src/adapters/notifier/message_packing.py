@@ -0,0 +1,116 @@
+from dataclasses import dataclass, field
+from typing import Callable, List
+from ...domain.models import Listing
+
+# Discord limits
+CONTENT_LIMIT = 2000
+EMBED_TITLE_LIMIT = 256
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_FOOTER_LIMIT = 2048
+EMBEDS_PER_MESSAGE = 10
+EMBED_TOTAL_LIMIT = 6000
+
+ENTRY_SEPARATOR = "\n\n"
+
+
+@dataclass(frozen=True)
+class EmbedSpec:
+    title: str
+    url: str
+    description: str
+    footer: str
+
+    @property
+    def size(self) -> int:
+        # Discord counts title, description and footer text towards the 6000 character total
+        return len(self.title) + len(self.description) + len(self.footer)
+
+
+@dataclass
+class PackedMessage:
+    listings: List[Listing] = field(default_factory=list)
+    content: str = ""
+    embeds: List[EmbedSpec] = field(default_factory=list)
+
+
+def trim(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit - 1)
+    if cut < limit * 0.6:
+        cut = limit - 1
+    return text[:cut].rstrip() + "…"
+
+
+def detail_summary(listing: Listing, with_contact: bool = False) -> str:
+    """One line of the structured detail-page fields that are present, e.g. 'Due: 02/04/2026 | Est. value: $100,000'."""
+    parts = []
+    if listing.solicitation_number and listing.solicitation_number != listing.id:
+        parts.append(f"Solicitation: {listing.solicitation_number}")
+    if listing.due_date:
+        parts.append(f"Due: {listing.due_date}")
+    if listing.estimated_value:
+        parts.append(f"Est. value: {listing.estimated_value}")
+    if with_contact and listing.contact:
+        parts.append(f"Contact: {listing.contact}")
+    return " | ".join(parts)
+
+
+def repost_tag(listing: Listing) -> str:
+    """Why a listing is posted again, if it is: an amendment of an earlier listing, or changed fields."""
+    if listing.amends:
+        return f"Amendment of {listing.amends}"
+    if listing.changes:
+        return f"Updated: {', '.join(listing.changes)}"
+    return ""
+
+
+def format_entry(listing: Listing, header: Callable[[Listing], str], description_chars: int, limit: int = CONTENT_LIMIT) -> str:
+    entry = header(listing)
+    desc = (listing.description or "").strip()
+    if desc and description_chars > 0:
+        entry += "\n> " + trim(desc, description_chars)
+    return entry if len(entry) <= limit else entry[:limit - 1] + "…"
+
+
+def pack_text(listings: List[Listing], header: Callable[[Listing], str], description_chars: int, limit: int = CONTENT_LIMIT) -> List[PackedMessage]:
+    """First-fit bin packing of listing entries into as few messages of at most `limit` characters as possible."""
+    messages: List[PackedMessage] = []
+    for l in listings:
+        entry = format_entry(l, header, description_chars, limit)
+        for m in messages:
+            if len(m.content) + len(ENTRY_SEPARATOR) + len(entry) <= limit:
+                m.content += ENTRY_SEPARATOR + entry
+                m.listings.append(l)
+                break
+        else:
+            messages.append(PackedMessage(listings=[l], content=entry))
+    return messages
+
+
+def build_embed(listing: Listing, description_chars: int) -> EmbedSpec:
+    desc = trim((listing.description or "").strip(), min(description_chars, EMBED_DESCRIPTION_LIMIT)) if description_chars > 0 else ""
+    tag = repost_tag(listing)
+    updated = f"[{tag}] " if tag else ""
+    return EmbedSpec(
+        title=trim(updated + listing.title, EMBED_TITLE_LIMIT),
+        url=listing.detail_url,
+        description=desc,
+        footer=trim(" | ".join(p for p in (f"ID: {listing.id}", listing.agency, listing.status, detail_summary(listing)) if p), EMBED_FOOTER_LIMIT),
+    )
+
+
+def pack_embeds(listings: List[Listing], description_chars: int) -> List[PackedMessage]:
+    """First-fit packing of one embed per listing, within Discord's per-message embed count and total size."""
+    messages: List[PackedMessage] = []
+    for l in listings:
+        embed = build_embed(l, description_chars)
+        for m in messages:
+            if len(m.embeds) < EMBEDS_PER_MESSAGE and sum(e.size for e in m.embeds) + embed.size <= EMBED_TOTAL_LIMIT:
+                m.embeds.append(embed)
+                m.listings.append(l)
+                break
+        else:
+            messages.append(PackedMessage(listings=[l], embeds=[embed]))
+    return messages
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+from .request_controller import RequestController
+
+
+class PoliteAsyncClient:
+    """Pooled httpx.AsyncClient with a global concurrency cap and per-host politeness limits.
+
+    With a RequestController, requests also go through its adaptive limit, retries and circuit breaker.
+    """
+
+    def __init__(
+        self,
+        headers: Dict[str, str],
+        max_concurrency: int = 8,
+        per_host_concurrency: int = 4,
+        per_host_min_interval: float = 0.0,
+        timeout: float = 30.0,
+        controller: Optional[RequestController] = None,
+    ) -> None:
+        self._headers = headers
+        self._controller = controller
+        self._timeout = timeout
+        self._max_concurrency = max(1, max_concurrency)
+        self._per_host_concurrency = max(1, per_host_concurrency)
+        self._per_host_min_interval = max(0.0, per_host_min_interval)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._host_locks: Dict[str, asyncio.Lock] = {}
+        self._host_last_start: Dict[str, float] = {}
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=self._max_concurrency,
+                max_keepalive_connections=self._max_concurrency,
+            )
+            self._client = httpx.AsyncClient(
+                headers=self._headers,
+                timeout=self._timeout,
+                limits=limits,
+                follow_redirects=True,
+            )
+            self._global = asyncio.Semaphore(self._max_concurrency)
+            self._hosts = {}
+            self._host_locks = {}
+            self._host_last_start = {}
+        return self._client
+
+    async def _wait_turn(self, host: str) -> None:
+        if self._per_host_min_interval <= 0:
+            return
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            last = self._host_last_start.get(host)
+            now = time.monotonic()
+            if last is not None:
+                delay = self._per_host_min_interval - (now - last)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self._host_last_start[host] = time.monotonic()
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        client = self._ensure_client()
+        host = urlsplit(url).netloc
+        host_sem = self._hosts.setdefault(host, asyncio.Semaphore(self._per_host_concurrency))
+        assert self._global is not None
+        global_sem = self._global
+
+        async def send() -> httpx.Response:
+            async with global_sem, host_sem:
+                await self._wait_turn(host)
+                return await client.get(url, headers=headers)
+
+        if self._controller is None:
+            return await send()
+        return await self._controller.request(send, kind="detail")
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
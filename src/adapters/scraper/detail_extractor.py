@@ -0,0 +1,131 @@
+import hashlib
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Set
+import lxml.etree
+import lxml.html
+
+# Elements that start a new block of text; everything else is treated as inline
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "body", "dd", "div", "dl", "dt", "fieldset", "figure", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "li", "main", "nav", "ol", "p", "pre", "section",
+    "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+})
+_SKIP_TAGS = ("script", "style", "noscript", "template")
+
+# Blocks this short are only considered as labels/values, never as description text
+MIN_DESCRIPTION_BLOCK = 40
+MAX_DESCRIPTION_BLOCKS = 80
+_MAX_LABEL_CHARS = 60
+
+# Label patterns for the structured fields on Procurement_Details.aspx
+FIELD_LABELS = (
+    ("solicitation_number", re.compile(r"^solicitation\s*(number|no\.?|#)", re.I)),
+    ("due_date", re.compile(r"due\s*date|closing\s*date|bid\s*due|response\s*due", re.I)),
+    ("contact", re.compile(r"^(contact|buyer|issuing\s*officer)", re.I)),
+    ("estimated_value", re.compile(r"estimated\s*(value|amount|cost)|contract\s*value", re.I)),
+)
+_INLINE_FIELD = re.compile(r"^([^:]{2,60}):\s*(.+)$", re.S)
+
+
+@dataclass(frozen=True)
+class DetailFields:
+    description: Optional[str] = None
+    solicitation_number: Optional[str] = None
+    due_date: Optional[str] = None
+    contact: Optional[str] = None
+    estimated_value: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _field_for(label: str) -> Optional[str]:
+    label = label.strip().rstrip(":").strip()
+    if not label or len(label) > _MAX_LABEL_CHARS:
+        return None
+    for name, pattern in FIELD_LABELS:
+        if pattern.search(label):
+            return name
+    return None
+
+
+def _leaf_blocks(root) -> List[str]:
+    """Text of every block, each character visited once; inner blocks come before their parent's loose text.
+
+    A block that contains other blocks contributes only its own loose text (its text, inline children and
+    tails), so nested div/td wrappers never repeat the text of the blocks inside them.
+    """
+    blocks: List[str] = []
+    # Elements whose subtree holds at least one block; filled bottom-up on "end" events
+    has_block: Set[Any] = set()
+    for event, el in lxml.etree.iterwalk(root, events=("end",)):
+        if not isinstance(el.tag, str):
+            continue
+        nested = el in has_block
+        if el.tag in BLOCK_TAGS or nested:
+            parent = el.getparent()
+            if parent is not None:
+                has_block.add(parent)
+        if el.tag not in BLOCK_TAGS:
+            continue
+        if not nested:
+            text = " ".join(el.itertext())
+        else:
+            parts = [el.text or ""]
+            for child in el:
+                if isinstance(child.tag, str) and child.tag not in BLOCK_TAGS and child not in has_block:
+                    parts.extend(child.itertext())
+                parts.append(child.tail or "")
+            text = " ".join(parts)
+        text = _normalize(text)
+        if text:
+            blocks.append(text)
+    return blocks
+
+
+def extract_details(html: str) -> DetailFields:
+    """Single pass over a details page: structured label/value fields plus de-duplicated description text."""
+    if not html or not html.strip():
+        return DetailFields()
+    doc = lxml.html.document_fromstring(html.encode("utf-8") if html.lstrip().startswith("<?xml") else html)
+    for el in list(doc.iter(*_SKIP_TAGS)):
+        el.drop_tree()
+    try:
+        root = doc.get_element_by_id("MainBody")
+    except KeyError:
+        root = doc
+
+    fields: Dict[str, str] = {}
+    description: List[str] = []
+    seen: Set[bytes] = set()
+    pending: Optional[str] = None  # field whose label block was just seen; the next block is its value
+    for text in _leaf_blocks(root):
+        if pending is not None:
+            field, pending = pending, None
+            # An empty value cell puts the next label right after this one; that block is a label, not the value
+            if not text.endswith(":") and _field_for(text) is None:
+                fields.setdefault(field, text)
+                continue
+        if text.endswith(":"):
+            pending = _field_for(text)
+            if pending is not None:
+                continue
+        inline = _INLINE_FIELD.match(text) if len(text) <= 200 else None
+        if inline:
+            name = _field_for(inline.group(1))
+            if name is not None:
+                fields.setdefault(name, inline.group(2).strip())
+                continue
+        if len(text) <= MIN_DESCRIPTION_BLOCK or len(description) >= MAX_DESCRIPTION_BLOCKS:
+            continue
+        digest = hashlib.blake2b(text.lower().encode("utf-8"), digest_size=8).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        description.append(text)
+    return DetailFields(description="\n".join(description) if description else None, **fields)
@@ -1,170 +1,202 @@
-from typing import List, Tuple, Dict, Set
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from typing import AsyncIterator, List, Dict, Set, Optional, Tuple
+import asyncio
+from dataclasses import replace
+import httpx
 from ...domain.models import Listing
+from ...domain.ports import ListingsScraperPort
 from ...infrastructure.config import settings
+from ...infrastructure.metrics import metrics
+from .async_http import PoliteAsyncClient
+from .detail_extractor import DetailFields, extract_details
+from .http_cache import HttpCache
+from .page_parser import ParsedPage, parse_results_page
+from .request_controller import RETRY_STATUSES, CircuitOpenError, RequestController
+from . import parallel_pager
 import os
 
 BASE_URL = settings.base_url
 HEADERS = {"User-Agent": os.getenv("USER_AGENT", "contract-scraper/1.0")}
 GRID_ID = "ctl00$MainBody$gdvSearchData"
-GRID_ID_HTML = "ctl00_MainBody_gdvSearchData"
+# Bump when the detail extraction changes so cached parse results are not reused
+DETAIL_PARSER = "details-v3"
 
 
-class EMarketplaceScraper:
+def _is_permanent(error: Exception) -> bool:
+    """A client error the portal will keep returning, such as 404 or 410 for a withdrawn listing."""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return False
+    status = error.response.status_code
+    return 400 <= status < 500 and status not in RETRY_STATUSES and status != 408
 
-    def _parse_listings_from_html(self, html: str) -> List[Listing]:
-        soup = BeautifulSoup(html, "lxml")
-        table = soup.find("table", id=GRID_ID_HTML)
-        if not table:
+
+class EMarketplaceScraper(ListingsScraperPort):
+    def __init__(self, http_cache: Optional[HttpCache] = None, base_url: str = BASE_URL, grid_id: str = GRID_ID,
+                 budget: Optional[asyncio.Semaphore] = None) -> None:
+        self.base_url = base_url
+        self.grid_id = grid_id
+        self._cache = http_cache
+        # One controller for pager sessions and detail fetches, since they hit the same portal
+        self._controller = RequestController(
+            max_limit=max(settings.enrich_concurrency, settings.crawl_sessions),
+            max_retries=settings.request_retries,
+            breaker_failures=settings.circuit_breaker_failures,
+            breaker_cooldown=settings.circuit_breaker_cooldown_seconds,
+            budget=budget,
+        )
+        self._http = PoliteAsyncClient(
+            headers=HEADERS,
+            max_concurrency=settings.enrich_concurrency,
+            per_host_concurrency=settings.enrich_per_host_concurrency,
+            per_host_min_interval=settings.enrich_per_host_interval_ms / 1000.0,
+            timeout=settings.request_timeout_seconds,
+            controller=self._controller,
+        )
+        # Failed runs in a row per detail url; a listing whose page keeps failing is eventually kept without it
+        self._failures: Dict[str, int] = {}
+
+    def _parse_page(self, html: str) -> ParsedPage:
+        # ASP.NET renders the grid's postback name ctl00$A$B as the table id ctl00_A_B
+        page = parse_results_page(html, self.base_url, self.grid_id.replace("$", "_"))
+        if not page.has_grid:
             print("[scraper] listings table not found")
-            return []
-        listings: List[Listing] = []
-        for row in table.find_all("tr"):
-            cells = row.find_all("td")
-            if len(cells) < 6:
-                continue
-            id_text = cells[0].get_text(strip=True)
-            title_cell = cells[1]
-            link = title_cell.find("a")
-            if not link:
-                continue
-            title = link.get_text(strip=True)
-            detail_href = link.get("href")
-            # Skip pager or invalid javascript links
-            if not detail_href or detail_href.startswith("javascript:"):
-                continue
-            if "Procurement_Details.aspx?id=" not in detail_href:
-                continue
-            detail_url = urljoin(BASE_URL, detail_href)
-            agency = cells[2].get_text(strip=True)
-            category = cells[3].get_text(strip=True)
-            status = cells[5].get_text(strip=True)
-            listings.append(Listing(id=id_text, title=title, agency=agency, category=category, status=status, detail_url=detail_url))
-        return listings
-
-    def _extract_form_fields(self, html: str) -> Dict[str, str]:
-        soup = BeautifulSoup(html, "lxml")
-        fields: Dict[str, str] = {}
-        for name in ["__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION", "__VIEWSTATEENCRYPTED"]:
-            el = soup.find("input", attrs={"name": name})
-            if el and el.has_attr("value"):
-                fields[name] = el.get("value", "")
-        # include all hidden inputs to be safe
-        for inp in soup.find_all("input", attrs={"type": "hidden"}):
-            name = inp.get("name")
-            if name and name not in fields:
-                fields[name] = inp.get("value", "")
-        return fields
-
-    def _find_pager_pages(self, html: str) -> Tuple[int, Set[int]]:
-        soup = BeautifulSoup(html, "lxml")
-        pages: Set[int] = set()
-        current = 1
-        pager_row = soup.find("tr", class_="GridPager")
-        if not pager_row:
-            return current, pages
-        for td in pager_row.find_all("td"):
-            # current page as <span>
-            span = td.find("span")
-            if span and span.get_text(strip=True).isdigit():
-                current = int(span.get_text(strip=True))
-            # linked pages
-            for a in td.find_all("a"):
-                text = a.get_text(strip=True)
-                if text.isdigit():
-                    pages.add(int(text))
-        return current, pages
-
-    def _postback_page(self, session: requests.Session, html: str, page: int) -> str:
-        form_fields = self._extract_form_fields(html)
-        data = {
-            "__EVENTTARGET": GRID_ID,
+        return page
+
+    async def _apostback_page(self, client: httpx.AsyncClient, form_fields: Dict[str, str], page: int) -> ParsedPage:
+        # Hidden __EVENTTARGET/__EVENTARGUMENT inputs are empty in the page; the pager event must win
+        data = dict(form_fields)
+        data.update({
+            "__EVENTTARGET": self.grid_id,
             "__EVENTARGUMENT": f"Page${page}",
-        }
-        data.update(form_fields)
+        })
         print(f"[scraper] POST page {page}")
-        resp = session.post(BASE_URL, data=data, headers=HEADERS, timeout=30)
+        with metrics.span("postback"):
+            # A retry resends this exact form, i.e. the ViewState of the page the event was rendered on
+            resp = await self._controller.request(lambda: client.post(self.base_url, data=data), kind="postback")
         print(f"[scraper] Page {page} status: {resp.status_code}")
+        metrics.inc("http_requests", kind="postback", status=resp.status_code)
+        metrics.inc("http_bytes", len(resp.content), kind="postback")
         resp.raise_for_status()
-        return resp.text
+        with metrics.span("results_parse"):
+            return await asyncio.to_thread(self._parse_page, resp.text)
 
-    def fetch_it_listings(self) -> List[Listing]:
-        session = requests.Session()
-        print(f"[scraper] GET {BASE_URL}")
-        resp = session.get(BASE_URL, headers=HEADERS, timeout=30)
-        print(f"[scraper] Status: {resp.status_code}")
-        resp.raise_for_status()
-        first_html = resp.text
-
-        all_listings: List[Listing] = []
-        page_current, page_links = self._find_pager_pages(first_html)
-        print(f"[scraper] Current page: {page_current}, links found: {sorted(page_links) if page_links else 'none'}")
-
-        # parse current page
-        current_list = self._parse_listings_from_html(first_html)
-        print(f"[scraper] Parsed {len(current_list)} IT listings on page {page_current}")
-        all_listings.extend(current_list)
-
-        # iterate all other linked pages
-        visited_pages: Set[int] = {page_current}
-        for p in sorted(page_links):
-            if p in visited_pages:
-                continue
-            html = self._postback_page(session, first_html, p)
-            page_current2, page_links2 = self._find_pager_pages(html)
-            listings_p = self._parse_listings_from_html(html)
-            print(f"[scraper] Parsed {len(listings_p)} IT listings on page {p}")
-            all_listings.extend(listings_p)
-            visited_pages.add(p)
-            # try to discover further pages if pager shifts (e.g., when there are many pages)
-            for np in page_links2:
-                if np not in visited_pages:
-                    html2 = self._postback_page(session, html, np)
-                    listings_np = self._parse_listings_from_html(html2)
-                    print(f"[scraper] Parsed {len(listings_np)} IT listings on page {np}")
-                    all_listings.extend(listings_np)
-                    visited_pages.add(np)
-                    html = html2
-
-        # de-duplicate by id
-        by_id: Dict[str, Listing] = {l.id: l for l in all_listings}
-        print(f"[scraper] Total unique IT listings: {len(by_id)}")
-        return list(by_id.values())
-
-    def enrich_description(self, listing: Listing) -> Listing:
+    async def _open_session(self) -> Tuple[httpx.AsyncClient, ParsedPage]:
+        # A dedicated client per session keeps its ASP.NET cookie separate from detail fetches and other sessions
+        client = httpx.AsyncClient(headers=HEADERS, timeout=settings.request_timeout_seconds, follow_redirects=True)
         try:
-            print(f"[scraper] Enrich {listing.id} -> {listing.detail_url}")
-            resp = requests.get(listing.detail_url, headers=HEADERS, timeout=30)
-            print(f"[scraper] Detail status: {resp.status_code}")
+            print(f"[scraper] GET {self.base_url}")
+            with metrics.span("results_get"):
+                resp = await self._controller.request(lambda: client.get(self.base_url), kind="results")
+            print(f"[scraper] Status: {resp.status_code}")
+            metrics.inc("http_requests", kind="results", status=resp.status_code)
+            metrics.inc("http_bytes", len(resp.content), kind="results")
+            resp.raise_for_status()
+            with metrics.span("results_parse"):
+                first = await asyncio.to_thread(self._parse_page, resp.text)
+        except BaseException:
+            await client.aclose()
+            raise
+        print(f"[scraper] Current page: {first.current_page}, links found: {sorted(first.pager_pages) if first.pager_pages else 'none'}")
+        return client, first
+
+    async def iter_listing_pages(self, full_sweep: bool = False) -> AsyncIterator[List[Listing]]:
+        # Full sweeps split the pager across independent sessions; incremental runs walk one chain in page order
+        sessions = max(1, settings.crawl_sessions) if full_sweep else 1
+        if sessions > 1:
+            print(f"[scraper] Walking the pager with {sessions} parallel sessions")
+        seen_ids: Set[str] = set()
+        pages = parallel_pager.iter_pages(self._open_session, self._apostback_page, sessions)
+        try:
+            async for page_no, listings in pages:
+                print(f"[scraper] Parsed {len(listings)} IT listings on page {page_no}")
+                fresh = [l for l in listings if l.id not in seen_ids]
+                seen_ids.update(l.id for l in fresh)
+                yield fresh
+        finally:
+            await pages.aclose()
+        print(f"[scraper] Total unique IT listings: {len(seen_ids)}")
+
+    def _extract_details(self, html: str) -> DetailFields:
+        return extract_details(html)
+
+    async def _get_detail(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        with metrics.span("detail_fetch"):
+            resp = await self._http.get(url, headers=headers)
+        metrics.inc("http_requests", kind="detail", status=resp.status_code)
+        metrics.inc("http_bytes", len(resp.content), kind="detail")
+        return resp
+
+    async def _parse_details(self, html: str) -> DetailFields:
+        # Parsing is CPU-bound; keep it off the event loop shared with Discord and the scheduler
+        with metrics.span("detail_parse"):
+            return await asyncio.to_thread(self._extract_details, html)
+
+    def _with_details(self, listing: Listing, details: DetailFields) -> Listing:
+        return replace(listing, **details.to_dict())
+
+    async def _cached_details(self, listing: Listing, cache: HttpCache) -> DetailFields:
+        cached = cache.lookup(listing.detail_url)
+        resp = await self._get_detail(listing.detail_url, headers=cache.conditional_headers(cached))
+        print(f"[scraper] Enrich {listing.id} status: {resp.status_code}")
+        body: Optional[bytes] = None
+        if resp.status_code == 304 and cached is not None:
+            cache.record_not_modified(cached)
+            digest = cached.body_hash
+        else:
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "lxml")
-            main = soup.find(id="MainBody") or soup
-            paragraphs = main.find_all(["p", "div", "td"])[:80]
-            text_parts = []
-            seen = set()
-            for p in paragraphs:
-                txt = p.get_text(" ", strip=True)
-                if not txt or len(txt) <= 40:
-                    continue
-                # de-duplicate exact repeats and already included substrings
-                if txt in seen:
-                    continue
-                if any(txt in prev or prev in txt for prev in text_parts):
-                    continue
-                seen.add(txt)
-                text_parts.append(txt)
-            description = "\n".join(text_parts) if text_parts else None
-            return Listing(
-                id=listing.id,
-                title=listing.title,
-                agency=listing.agency,
-                category=listing.category,
-                status=listing.status,
-                detail_url=listing.detail_url,
-                description=description,
-            )
+            # Stored as decoded UTF-8 text so a cached body parses the same without the response headers
+            body = resp.text.encode("utf-8")
+            digest = cache.store(listing.detail_url, body, resp.headers.get("etag"), resp.headers.get("last-modified"), cached)
+        parsed = cache.get_parsed(digest, DETAIL_PARSER)
+        if parsed is not None:
+            return DetailFields(**parsed)
+        if body is None:
+            body = cache.read_body(digest)
+        if body is None:
+            # The blob vanished between lookup and read; fetch the page again without validators
+            resp = await self._get_detail(listing.detail_url)
+            resp.raise_for_status()
+            body = resp.text.encode("utf-8")
+            digest = cache.store(listing.detail_url, body, resp.headers.get("etag"), resp.headers.get("last-modified"))
+        details = await self._parse_details(body.decode("utf-8"))
+        cache.put_parsed(digest, DETAIL_PARSER, details.to_dict())
+        return details
+
+    async def _enrich_one(self, listing: Listing) -> Listing:
+        try:
+            if self._cache is not None:
+                enriched = self._with_details(listing, await self._cached_details(listing, self._cache))
+            else:
+                resp = await self._get_detail(listing.detail_url)
+                print(f"[scraper] Enrich {listing.id} status: {resp.status_code}")
+                resp.raise_for_status()
+                enriched = self._with_details(listing, await self._parse_details(resp.text))
+            self._failures.pop(listing.detail_url, None)
+            return enriched
         except Exception as e:
             print(f"[scraper] Enrich error for {listing.id}: {e}")
-            return listing
+            metrics.inc("enrich_errors")
+            if _is_permanent(e):
+                print(f"[scraper] Detail page of {listing.id} is gone; keeping the listing without a description.")
+                return listing
+            if not isinstance(e, CircuitOpenError):
+                failures = self._failures[listing.detail_url] = self._failures.get(listing.detail_url, 0) + 1
+                if settings.detail_max_failures > 0 and failures >= settings.detail_max_failures:
+                    print(f"[scraper] Detail page of {listing.id} failed {failures} run(s) in a row; keeping the listing without a description.")
+                    self._failures.pop(listing.detail_url, None)
+                    return listing
+            # Flagged rather than returned bare, so it is not classified and stored as if it had no description
+            return replace(listing, detail_error=str(e) or type(e).__name__)
+
+    async def enrich_descriptions(self, listings: List[Listing]) -> List[Listing]:
+        if not listings:
+            return []
+        print(f"[scraper] Enriching {len(listings)} listings (concurrency={settings.enrich_concurrency}, per-host={settings.enrich_per_host_concurrency})…")
+        return list(await asyncio.gather(*(self._enrich_one(l) for l in listings)))
+
+    def report_stats(self) -> None:
+        self._controller.report_stats()
+        if self._cache is not None:
+            self._cache.report_stats()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
@@ -0,0 +1,73 @@
+import asyncio
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, Generic, List, Optional, Sequence, Set, TypeVar, Union
+
+T = TypeVar("T")
+
+
+class _Done:
+    """Type of the marker an iterable's task puts once it has nothing more to give."""
+
+
+_DONE = _Done()
+
+
+class FanIn(Generic[T]):
+    """Several async generators merged into one stream, in completion order.
+
+    Each generator runs in its own task and hands items to the reader through a queue of `maxsize`, so
+    they wait while the reader is busy instead of running ahead. A failed generator does not stop the
+    others; the first error is raised once they are all done, so the reader knows its stream is
+    incomplete. A generator can be stopped on its own with stop(); it then counts as finished.
+    """
+
+    def __init__(self, generators: Sequence[AsyncGenerator[T, None]], maxsize: int) -> None:
+        self._generators = list(generators)
+        self._maxsize = max(1, maxsize)
+        self._tasks: List[asyncio.Task] = []
+        self._stopped: Set[int] = set()
+        self._error: Optional[Exception] = None
+
+    def stop(self, index: int) -> bool:
+        """Cancel the generator at `index` while the others keep going. False if it had already finished."""
+        if index >= len(self._tasks) or self._tasks[index].done():
+            return False
+        self._stopped.add(index)
+        self._tasks[index].cancel()
+        return True
+
+    async def _drain(self, index: int, generator: AsyncGenerator[T, None], out: "asyncio.Queue[Union[T, _Done]]") -> None:
+        try:
+            async with aclosing(generator) as items:
+                async for item in items:
+                    await out.put(item)
+        except asyncio.CancelledError:
+            if index not in self._stopped:
+                raise
+            task = asyncio.current_task()
+            if task is not None:
+                task.uncancel()
+        except Exception as e:
+            self._error = self._error or e
+        # Not in a finally: tasks are only cancelled for good once the reader is gone, and a put on a full
+        # queue would never return
+        await out.put(_DONE)
+
+    async def items(self) -> AsyncIterator[T]:
+        """Yield items until every generator is done; close it early to cancel the ones still running."""
+        out: "asyncio.Queue[Union[T, _Done]]" = asyncio.Queue(maxsize=self._maxsize)
+        self._tasks = [asyncio.create_task(self._drain(i, g, out)) for i, g in enumerate(self._generators)]
+        try:
+            finished = 0
+            while finished < len(self._tasks):
+                item = await out.get()
+                if isinstance(item, _Done):
+                    finished += 1
+                else:
+                    yield item
+            if self._error is not None:
+                raise self._error
+        finally:
+            for t in self._tasks:
+                t.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from ...infrastructure.metrics import metrics
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "..", "data", "http_cache")
+CACHE_DIR = os.path.abspath(CACHE_DIR)
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body_hash: str
+
+
+class HttpCache:
+    """Content-addressed on-disk cache of response bodies with validators, parse results and LRU size eviction.
+
+    Bodies are stored once per SHA-256 under `blobs/`, zlib-compressed; a SQLite index maps each URL to its
+    validators and body hash. Parse results are keyed by body hash and parser version, so an unchanged page
+    is never parsed twice.
+    """
+
+    def __init__(self, path: str = CACHE_DIR, max_bytes: int = 200 * 1024 * 1024) -> None:
+        self.path = path
+        self.max_bytes = max(0, max_bytes)
+        os.makedirs(os.path.join(self.path, "blobs"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(self.path, "index.sqlite3"))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body_hash TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_body_hash ON responses(body_hash)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_last_used ON blobs(last_used)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS parsed (body_hash TEXT NOT NULL, parser TEXT NOT NULL, result TEXT NOT NULL, "
+                "PRIMARY KEY (body_hash, parser))"
+            )
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        self.requests = 0
+        self.not_modified = 0
+        self.same_body = 0
+        self.parses_skipped = 0
+        self.bytes_downloaded = 0
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.path, "blobs", digest[:2], digest)
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        row = self._conn.execute("SELECT etag, last_modified, body_hash FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        if not os.path.exists(self._blob_path(row[2])):
+            # Blob lost outside of eviction; forget the entry so the next request is unconditional
+            with self._conn:
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            return None
+        return CachedResponse(url, row[0], row[1], row[2])
+
+    def conditional_headers(self, cached: Optional[CachedResponse]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if cached is None:
+            return headers
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def read_body(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                data = zlib.decompress(f.read())
+        except (FileNotFoundError, zlib.error):
+            return None
+        with self._conn:
+            self._conn.execute("UPDATE blobs SET last_used = ? WHERE hash = ?", (time.time(), digest))
+        return data
+
+    def record_not_modified(self, cached: CachedResponse) -> None:
+        self.requests += 1
+        self.not_modified += 1
+        metrics.inc("http_cache_responses", result="not_modified")
+        now = time.time()
+        with self._conn:
+            self._conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (now, cached.url))
+            self._conn.execute("UPDATE blobs SET last_used = ? WHERE hash = ?", (now, cached.body_hash))
+
+    def store(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str], previous: Optional[CachedResponse] = None) -> str:
+        """Record a 200 response and return its body hash; identical bodies share one blob."""
+        self.requests += 1
+        self.bytes_downloaded += len(body)
+        digest = body_hash(body)
+        if previous is not None and previous.body_hash == digest:
+            self.same_body += 1
+            metrics.inc("http_cache_responses", result="same_body")
+        else:
+            metrics.inc("http_cache_responses", result="miss")
+        now = time.time()
+        exists = self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is not None
+        if not exists:
+            blob = zlib.compress(body, 6)
+            target = self._blob_path(digest)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = target + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, target)
+            self._total_bytes += len(blob)
+        with self._conn:
+            if exists:
+                self._conn.execute("UPDATE blobs SET last_used = ? WHERE hash = ?", (now, digest))
+            else:
+                self._conn.execute("INSERT INTO blobs (hash, size, last_used) VALUES (?, ?, ?)", (digest, len(blob), now))
+            self._conn.execute(
+                "INSERT INTO responses (url, etag, last_modified, body_hash, fetched_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+                "body_hash = excluded.body_hash, fetched_at = excluded.fetched_at",
+                (url, etag, last_modified, digest, now),
+            )
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+        return digest
+
+    def get_parsed(self, digest: str, parser: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT result FROM parsed WHERE body_hash = ? AND parser = ?", (digest, parser)).fetchone()
+        if row is None:
+            return None
+        self.parses_skipped += 1
+        metrics.inc("http_cache_parses_skipped")
+        return json.loads(row[0])
+
+    def put_parsed(self, digest: str, parser: str, result: Dict[str, Any]) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parsed (body_hash, parser, result) VALUES (?, ?, ?)",
+                (digest, parser, json.dumps(result)),
+            )
+
+    def evict(self) -> int:
+        """Drop least recently used blobs, with their URL entries and parse results, until under max_bytes."""
+        evicted = 0
+        rows = self._conn.execute("SELECT hash, size FROM blobs ORDER BY last_used ASC").fetchall()
+        with self._conn:
+            for digest, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE body_hash = ?", (digest,))
+                self._conn.execute("DELETE FROM parsed WHERE body_hash = ?", (digest,))
+                self._conn.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+                try:
+                    os.remove(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+                self._total_bytes -= size
+                evicted += 1
+        return evicted
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def report_stats(self) -> None:
+        hits = self.not_modified + self.same_body
+        ratio = hits / self.requests if self.requests else 0.0
+        print(
+            f"[http-cache] {self.requests} detail request(s): {self.not_modified} not modified, {self.same_body} unchanged body "
+            f"(hit ratio {ratio:.0%}); {self.parses_skipped} parse(s) skipped; {self.bytes_downloaded / 1024:.0f} KiB downloaded; "
+            f"{self._total_bytes / (1024 * 1024):.1f} MiB on disk"
+        )
+        self.requests = self.not_modified = self.same_body = self.parses_skipped = self.bytes_downloaded = 0
+
+    def close(self) -> None:
+        self._conn.close()
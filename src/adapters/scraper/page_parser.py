@@ -0,0 +1,121 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List
+from urllib.parse import urljoin
+import lxml.etree
+import lxml.html
+from ...domain.models import Listing
+
+GRID_ID_HTML = "ctl00_MainBody_gdvSearchData"
+FORM_STATE_FIELDS = ("__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION", "__VIEWSTATEENCRYPTED")
+
+# The grid's table id is an XPath variable, so portals with another grid reuse the compiled expressions
+_XP_GRID_ROWS = lxml.etree.XPath("//table[@id=$grid]//tr")
+_XP_HAS_GRID = lxml.etree.XPath("boolean(//table[@id=$grid])")
+_XP_PAGER_ROW = lxml.etree.XPath("(//tr[contains(concat(' ', normalize-space(@class), ' '), ' GridPager ')])[1]")
+_XP_INPUTS = lxml.etree.XPath("//input[@name]")
+_PAGE_ARG = re.compile(r"Page\$(\d+)")
+
+
+@dataclass(frozen=True)
+class ParsedPage:
+    listings: List[Listing]
+    current_page: int = 1
+    pager_pages: FrozenSet[int] = frozenset()
+    # Targets of the "..." links that move the pager to the previous/next window of pages
+    jump_pages: FrozenSet[int] = frozenset()
+    form_fields: Dict[str, str] = field(default_factory=dict)
+    has_grid: bool = True
+
+
+def _text(el) -> str:
+    # Mirrors BeautifulSoup's get_text(strip=True): strip each text node, then concatenate
+    return "".join(t.strip() for t in el.itertext())
+
+
+def _parse_rows(doc, base_url: str, grid_html_id: str) -> List[Listing]:
+    listings: List[Listing] = []
+    for row in _XP_GRID_ROWS(doc, grid=grid_html_id):
+        cells = row.findall("td")
+        if len(cells) < 6:
+            continue
+        link = cells[1].find(".//a")
+        if link is None:
+            continue
+        detail_href = link.get("href")
+        # Skip pager or invalid javascript links
+        if not detail_href or detail_href.startswith("javascript:"):
+            continue
+        if "Procurement_Details.aspx?id=" not in detail_href:
+            continue
+        listings.append(
+            Listing(
+                id=_text(cells[0]),
+                title=_text(link),
+                agency=_text(cells[2]),
+                category=_text(cells[3]),
+                status=_text(cells[5]),
+                detail_url=urljoin(base_url, detail_href),
+            )
+        )
+    return listings
+
+
+def _parse_pager(doc) -> tuple[int, FrozenSet[int], FrozenSet[int]]:
+    current = 1
+    rows = _XP_PAGER_ROW(doc)
+    if not rows:
+        return current, frozenset(), frozenset()
+    pager = rows[0]
+    for span in pager.iter("span"):
+        text = _text(span)
+        if text.isdigit():
+            current = int(text)
+    pages = set()
+    jumps = set()
+    for a in pager.iter("a"):
+        text = _text(a)
+        if text.isdigit():
+            pages.add(int(text))
+            continue
+        match = _PAGE_ARG.search(a.get("href") or "")
+        if match:
+            jumps.add(int(match.group(1)))
+    return current, frozenset(pages), frozenset(jumps)
+
+
+def _parse_form_fields(doc) -> Dict[str, str]:
+    fields: Dict[str, str] = {}
+    hidden: Dict[str, str] = {}
+    for inp in _XP_INPUTS(doc):
+        name = inp.get("name")
+        if name in FORM_STATE_FIELDS:
+            value = inp.get("value")
+            if value is not None and name not in fields:
+                fields[name] = value
+        if (inp.get("type") or "").lower() == "hidden" and name not in hidden:
+            hidden[name] = inp.get("value", "")
+    # include all hidden inputs to be safe
+    for name, value in hidden.items():
+        fields.setdefault(name, value)
+    return fields
+
+
+def parse_results_page(html: str, base_url: str, grid_html_id: str = GRID_ID_HTML) -> ParsedPage:
+    """Parse a Procurement.aspx results page once and return rows, pager state and form fields together."""
+    if not html or not html.strip():
+        return ParsedPage(listings=[], has_grid=False)
+    if html.lstrip().startswith("<?xml"):
+        # lxml refuses str input that carries an encoding declaration
+        doc = lxml.html.document_fromstring(html.encode("utf-8"))
+    else:
+        doc = lxml.html.document_fromstring(html)
+    current, pages, jumps = _parse_pager(doc)
+    return ParsedPage(
+        listings=_parse_rows(doc, base_url, grid_html_id),
+        current_page=current,
+        pager_pages=pages,
+        jump_pages=jumps,
+        form_fields=_parse_form_fields(doc),
+        has_grid=bool(_XP_HAS_GRID(doc, grid=grid_html_id)),
+    )
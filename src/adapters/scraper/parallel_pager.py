@@ -0,0 +1,80 @@
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Set, Tuple
+import httpx
+from ...domain.models import Listing
+from .fan_in import FanIn
+from .page_parser import ParsedPage
+
+# Opens an independent ASP.NET session: a fresh client (own cookies) and its first results page
+OpenSession = Callable[[], Awaitable[Tuple[httpx.AsyncClient, ParsedPage]]]
+# Posts a pager event from a page's form state and parses the response
+Postback = Callable[[httpx.AsyncClient, Dict[str, str], int], Awaitable[ParsedPage]]
+
+def next_target(page: ParsedPage, claimed: Set[int]) -> Tuple[int, bool]:
+    """Pick the next page to post from `page`'s pager state.
+
+    Returns (page number, whether it is a new page). Unclaimed pages in the current pager window come
+    first, lowest number first; once the window is used up the forward "..." link is followed even when
+    another session already fetched that page, since it is the only way to reach the next window with
+    this session's ViewState. Returns (0, False) when nothing is left to reach from here.
+    """
+    window = sorted(p for p in page.pager_pages if p not in claimed)
+    if window:
+        return window[0], True
+    forward = [p for p in page.jump_pages if p > page.current_page]
+    if not forward:
+        return 0, False
+    target = min(forward)
+    return target, target not in claimed
+
+
+async def _walk_session(index: int, open_session: OpenSession, postback: Postback, claimed: Set[int]) -> AsyncGenerator[Tuple[int, List[Listing]], None]:
+    hops = 0
+    target, fresh = 0, False
+    try:
+        client, page = await open_session()
+        try:
+            if page.current_page not in claimed:
+                claimed.add(page.current_page)
+                yield page.current_page, page.listings
+            while True:
+                target, fresh = next_target(page, claimed)
+                if not target:
+                    break
+                if fresh:
+                    claimed.add(target)
+                else:
+                    hops += 1
+                page = await postback(client, page.form_fields, target)
+                if page.current_page != target:
+                    raise RuntimeError(f"session {index} asked for page {target} but got page {page.current_page}")
+                if fresh:
+                    yield target, page.listings
+                target, fresh = 0, False
+        finally:
+            await client.aclose()
+    except Exception as e:
+        if fresh:
+            # Hand the page back so a session that is still healthy can fetch it
+            claimed.discard(target)
+        print(f"[pager] Session {index} failed: {e}")
+        raise
+    if hops:
+        print(f"[pager] Session {index} re-fetched {hops} page(s) to move between pager windows")
+
+
+async def iter_pages(open_session: OpenSession, postback: Postback, sessions: int = 1) -> AsyncIterator[Tuple[int, List[Listing]]]:
+    """Walk every results page with `sessions` independent ASP.NET sessions and yield (page, listings).
+
+    Each session keeps its own ViewState chain and claims pages from a shared set, so every page is
+    fetched as new by exactly one session. With one session pages come in ascending order, like the
+    serial pager walk; with several they come in completion order. A failed session does not stop the
+    others; the first error is raised once they are all done, so the caller knows the walk is incomplete.
+    The queue holds one page per session, so sessions wait while the caller is busy with earlier pages.
+    """
+    claimed: Set[int] = set()
+    sessions = max(1, sessions)
+    walks = FanIn([_walk_session(i, open_session, postback, claimed) for i in range(sessions)], maxsize=sessions)
+    async with aclosing(walks.items()) as pages:
+        async for item in pages:
+            yield item
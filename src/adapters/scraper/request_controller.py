@@ -0,0 +1,185 @@
+import asyncio
+import random
+import time
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
+import httpx
+from ...infrastructure.metrics import metrics
+
+# Statuses that mean "try again later" rather than "this request is wrong"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending while the portal is considered down."""
+
+
+class RequestFailedError(RuntimeError):
+    """A request still failed after every retry."""
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    value = resp.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestController:
+    """Shared limiter for every request to the portal: AIMD concurrency, jittered retries and a circuit breaker.
+
+    The concurrency limit grows by about one per round of successful requests and halves when a request fails
+    or its latency climbs well above the best recently seen for that kind of request (results pages carry a
+    large ViewState and are slower than detail pages), at most once per cooldown so one burst of slow
+    responses counts once. Failed attempts (transport errors, 429 and 5xx) are retried with full-jitter
+    exponential backoff, honouring Retry-After. After `breaker_failures` failures in a row the circuit opens:
+    requests fail fast with CircuitOpenError until `breaker_cooldown` has passed, then a single trial request
+    decides whether it closes again.
+
+    Controllers for different portals can share a `budget` semaphore that caps requests in flight across all
+    of them, on top of each one's own limit.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, initial_limit: Optional[int] = None, max_retries: int = 4,
+                 backoff_base: float = 0.5, backoff_cap: float = 20.0, latency_tolerance: float = 2.5,
+                 breaker_failures: int = 8, breaker_cooldown: float = 30.0, budget: Optional[asyncio.Semaphore] = None) -> None:
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial_limit or self.max_limit)))
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.latency_tolerance = latency_tolerance
+        self.breaker_failures = max(1, breaker_failures)
+        self.breaker_cooldown = breaker_cooldown
+        self.budget = budget
+        self._in_flight = 0
+        self._slot_freed = asyncio.Condition()
+        self._baselines: Dict[str, float] = {}
+        self._last_decrease = 0.0
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._trial_in_flight = False
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.trips = 0
+
+    # Concurrency window
+
+    async def _acquire(self) -> None:
+        async with self._slot_freed:
+            await self._slot_freed.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+
+    async def _release(self) -> None:
+        async with self._slot_freed:
+            self._in_flight -= 1
+            self._slot_freed.notify_all()
+
+    def _decrease(self, now: float) -> None:
+        cooldown = max(max(self._baselines.values(), default=0.0), 0.1)
+        if now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit / 2)
+
+    def _on_success(self, kind: str, latency: float) -> None:
+        self._consecutive_failures = 0
+        self._trial_in_flight = False
+        self._open_until = 0.0
+        # The baseline follows the fastest recent responses and drifts up slowly if the portal gets slower overall
+        baseline = self._baselines.get(kind)
+        baseline = latency if baseline is None or latency < baseline else baseline + 0.01 * (latency - baseline)
+        self._baselines[kind] = baseline
+        if latency > baseline * self.latency_tolerance and latency > 0.05:
+            self._decrease(time.monotonic())
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    def _on_failure(self) -> None:
+        now = time.monotonic()
+        self.failures += 1
+        self._consecutive_failures += 1
+        self._decrease(now)
+        if self._trial_in_flight or self._consecutive_failures >= self.breaker_failures:
+            if now >= self._open_until:
+                self.trips += 1
+                metrics.inc("circuit_breaker_trips")
+                print(f"[http] {self._consecutive_failures} failure(s) in a row; pausing requests for {self.breaker_cooldown:.0f}s")
+            self._open_until = now + self.breaker_cooldown
+            self._trial_in_flight = False
+
+    def _check_circuit(self) -> bool:
+        """Raise while the circuit is open; True when this request is the half-open trial."""
+        if not self._open_until:
+            return False
+        now = time.monotonic()
+        if now < self._open_until or self._trial_in_flight:
+            raise CircuitOpenError(f"portal unavailable; circuit open for another {max(0.0, self._open_until - now):.0f}s")
+        # Half-open: this request is the trial; everything else keeps failing fast until it returns
+        self._trial_in_flight = True
+        return True
+
+    def _backoff(self, attempt: int, resp: Optional[httpx.Response]) -> float:
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+        hinted = _retry_after(resp) if resp is not None else None
+        return max(delay, min(hinted, self.backoff_cap)) if hinted is not None else delay
+
+    async def request(self, send: Callable[[], Awaitable[httpx.Response]], kind: str = "request") -> httpx.Response:
+        """Send with retries; `send` must be safe to repeat (GETs, or postbacks replaying the same form state).
+
+        Returns the last response, which may still be a 4xx for the caller to handle; raises RequestFailedError
+        when every attempt failed and CircuitOpenError while the circuit is open.
+        """
+        attempt = 0
+        while True:
+            trial = self._check_circuit()
+            resp: Optional[httpx.Response] = None
+            error: Optional[Exception] = None
+            try:
+                await self._acquire()
+                try:
+                    # Latency is timed from when the shared budget lets the request go
+                    async with self.budget or nullcontext():
+                        started = time.monotonic()
+                        try:
+                            resp = await send()
+                        except httpx.TransportError as e:
+                            error = e
+                finally:
+                    await self._release()
+            except BaseException:
+                # Cancelled or a non-network error: do not leave the circuit waiting on a trial that never reports
+                if trial:
+                    self._trial_in_flight = False
+                raise
+            self.requests += 1
+            if error is None and resp is not None and resp.status_code not in RETRY_STATUSES:
+                self._on_success(kind, time.monotonic() - started)
+                return resp
+            self._on_failure()
+            reason = type(error).__name__ if error is not None else str(resp.status_code if resp is not None else "?")
+            if attempt >= self.max_retries:
+                raise RequestFailedError(f"{kind} failed after {attempt + 1} attempt(s): {error or reason}") from error
+            delay = self._backoff(attempt, resp)
+            self.retries += 1
+            metrics.inc("http_retries", kind=kind, reason=reason)
+            print(f"[http] {kind} attempt {attempt + 1} failed ({reason}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def report_stats(self) -> None:
+        print(
+            f"[http] {self.requests} request(s), {self.retries} retried, {self.failures} failed attempt(s), "
+            f"{self.trips} circuit trip(s); concurrency limit now {self.limit:.1f} (range {self.min_limit}-{self.max_limit})"
+        )
+        self.requests = self.retries = self.failures = self.trips = 0
@@ -0,0 +1,127 @@
+import asyncio
+from contextlib import aclosing
+from dataclasses import dataclass, replace
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Optional, Set, Tuple
+from ...domain.models import Listing
+from ...domain.ports import ListingsScraperPort
+from .fan_in import FanIn
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    namespace: str  # prefix for listing ids; "" keeps the scraper's own ids
+    scraper: ListingsScraperPort
+
+
+def parse_sources(spec: str) -> List[Tuple[str, str, Optional[str]]]:
+    """Parse SOURCES into (namespace, url, grid id) triples.
+
+    Entries are comma-separated `namespace=url`, optionally followed by `|grid_id` when the results grid
+    is not the default one. Several entries may share a namespace when they are search views of one portal.
+    """
+    out: List[Tuple[str, str, Optional[str]]] = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        namespace, sep, rest = entry.partition("=")
+        url, _, grid = rest.partition("|")
+        namespace, url = namespace.strip(), url.strip()
+        if not sep or not namespace or not url or ":" in namespace:
+            raise ValueError(f"SOURCES entries must look like name=https://host/page.aspx[|grid_id], got {entry!r}")
+        out.append((namespace, url, grid.strip() or None))
+    return out
+
+
+async def _crawl(source: Source, full_sweep: bool) -> AsyncGenerator[Tuple[Source, List[Listing]], None]:
+    try:
+        async with aclosing(source.scraper.iter_listing_pages(full_sweep=full_sweep)) as pages:
+            async for page in pages:
+                if source.namespace:
+                    page = [replace(l, id=f"{source.namespace}:{l.id}") for l in page]
+                yield source, page
+    except Exception as e:
+        print(f"[sources] {source.name} failed: {e}")
+        raise
+
+
+class SourceRegistry(ListingsScraperPort):
+    """Several scrapers behind one port, so they share state, the classifier and the notifier.
+
+    Sources are crawled concurrently and their pages merged in completion order, so a crawl takes about as
+    long as the slowest source. Ids get the source's namespace as a prefix; details are fetched by the
+    source that produced the listing. Each source can be stopped on its own once it only returns known
+    listings. A failed source does not stop the others; its error is raised once they are all done, so the
+    run is not counted as a complete crawl.
+    """
+
+    def __init__(self, sources: List[Source]) -> None:
+        if not sources:
+            raise ValueError("SourceRegistry needs at least one source")
+        names = [s.name for s in sources]
+        if len(set(names)) != len(names):
+            raise ValueError(f"source names must be unique, got {names}")
+        self.sources = sources
+        # The first source of a namespace fetches details for listings that were not crawled this run
+        self._by_namespace: Dict[str, Source] = {}
+        for s in sources:
+            self._by_namespace.setdefault(s.namespace, s)
+        self._origin: Dict[str, Source] = {}
+        self._crawls: Optional[FanIn[Tuple[Source, List[Listing]]]] = None
+
+    def _source_for(self, listing_id: str) -> Source:
+        source = self._origin.get(listing_id)
+        if source is not None:
+            return source
+        namespace, sep, _ = listing_id.partition(":")
+        source = self._by_namespace.get(namespace) if sep else None
+        return source or self._by_namespace.get("") or self.sources[0]
+
+    async def iter_listing_pages(self, full_sweep: bool = False) -> AsyncIterator[List[Listing]]:
+        print(f"[sources] Crawling {len(self.sources)} source(s) concurrently: {', '.join(s.name for s in self.sources)}")
+        self._origin = {}
+        # One page per source in flight to the reader; a source waits while the pipeline is busy
+        self._crawls = FanIn([_crawl(s, full_sweep) for s in self.sources], maxsize=len(self.sources))
+        seen: Set[str] = set()
+        counts: Dict[str, int] = {s.name: 0 for s in self.sources}
+        async with aclosing(self._crawls.items()) as pages:
+            async for source, page in pages:
+                # The same listing can come from two views of one portal; the first one to report it owns it
+                fresh = [l for l in page if l.id not in seen]
+                seen.update(l.id for l in fresh)
+                for l in fresh:
+                    self._origin[l.id] = source
+                counts[source.name] += len(fresh)
+                yield fresh
+        print(f"[sources] Listings per source: {', '.join(f'{name} {n}' for name, n in counts.items())}")
+
+    def source_count(self) -> int:
+        return len(self.sources)
+
+    def source_of(self, listing: Listing) -> str:
+        return self._source_for(listing.id).name
+
+    def stop_source(self, source: str) -> bool:
+        index = next((i for i, s in enumerate(self.sources) if s.name == source), None)
+        if self._crawls is not None and index is not None and self._crawls.stop(index):
+            print(f"[sources] Stopping {source}; the other sources keep crawling")
+        return True
+
+    async def enrich_descriptions(self, listings: List[Listing]) -> List[Listing]:
+        groups: Dict[str, List[Listing]] = {}
+        for l in listings:
+            groups.setdefault(self._source_for(l.id).name, []).append(l)
+        by_name = {s.name: s for s in self.sources}
+        results = await asyncio.gather(*(by_name[name].scraper.enrich_descriptions(group) for name, group in groups.items()))
+        enriched = {l.id: l for batch in results for l in batch}
+        return [enriched.get(l.id, l) for l in listings]
+
+    def report_stats(self) -> None:
+        for s in self.sources:
+            print(f"[sources] Stats for {s.name}:")
+            s.scraper.report_stats()
+
+    async def aclose(self) -> None:
+        for s in self.sources:
+            await s.scraper.aclose()
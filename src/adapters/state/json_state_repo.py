@@ -1,22 +1,57 @@
 import json
 import os
-from typing import List
-from ...domain.models import Listing
+from typing import Dict, List, Optional
+from ...domain.models import Listing, persisted_fields, to_record
+from ...domain.ports import StateRepositoryPort
 
 STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "..", "data", "state.json")
 STATE_PATH = os.path.abspath(STATE_PATH)
 
 
-class JsonStateRepository:
+class JsonStateRepository(StateRepositoryPort):
+    def __init__(self, path: str = STATE_PATH) -> None:
+        self.path = path
+
     def load_last_snapshot(self) -> List[Listing]:
         try:
-            with open(STATE_PATH, "r", encoding="utf-8") as f:
+            with open(self.path, "r", encoding="utf-8") as f:
                 raw = json.load(f)
-            return [Listing(**item) for item in raw]
+            known = set(persisted_fields())
+            return [Listing(**{k: v for k, v in item.items() if k in known}) for item in raw]
         except FileNotFoundError:
             return []
 
     def save_snapshot(self, listings: List[Listing]) -> None:
-        os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
-        with open(STATE_PATH, "w", encoding="utf-8") as f:
-            json.dump([l.__dict__ for l in listings], f, ensure_ascii=False, indent=2)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Write to a sibling file and swap it in so a crash mid-write cannot corrupt state
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([to_record(l) for l in listings], f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def reset(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _meta_path(self) -> str:
+        return os.path.splitext(self.path)[0] + ".meta.json"
+
+    def _load_meta(self) -> Dict[str, str]:
+        try:
+            with open(self._meta_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def get_meta(self, key: str) -> Optional[str]:
+        return self._load_meta().get(key)
+
+    def set_meta(self, key: str, value: str) -> None:
+        meta = self._load_meta()
+        meta[key] = value
+        tmp_path = self._meta_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self._meta_path())
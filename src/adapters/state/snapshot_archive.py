@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+from ...domain.models import Listing, persisted_fields
+from ...domain.ports import SnapshotArchivePort
+
+ARCHIVE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "..", "data", "archive.sqlite3")
+ARCHIVE_PATH = os.path.abspath(ARCHIVE_PATH)
+
+# Fingerprints are derived from the other fields, so they are not archived
+ARCHIVED_FIELDS: Tuple[str, ...] = tuple(f for f in persisted_fields() if f not in ("row_hash", "detail_hash"))
+
+_CHUNK = 500
+
+
+@dataclass(frozen=True, slots=True)
+class ArchivedRun:
+    run_id: int
+    started_at: float
+    finished_at: float
+    full_sweep: bool
+    added: int
+    changed: int
+    removed: int
+    live: int
+
+
+T = TypeVar("T")
+
+
+def _chunks(values: Iterable[T]) -> Iterator[List[T]]:
+    it = iter(values)
+    while chunk := list(islice(it, _CHUNK)):
+        yield chunk
+
+
+def description_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class SqliteSnapshotArchive(SnapshotArchivePort):
+    """Append-only history of listing state, one delta per sync run.
+
+    A run stores a version row only for listings whose archived fields differ from their previous version,
+    plus a tombstone for listings that disappeared from a complete crawl. Version records are compact JSON
+    without None fields; descriptions live in zlib-compressed blobs keyed by content hash, so an unchanged
+    description is stored once however many versions refer to it. `heads` tracks the latest version of each
+    listing, and the (listing_id, run_id) primary key answers point-in-time and per-listing history queries
+    from the index alone.
+    """
+
+    def __init__(self, path: str = ARCHIVE_PATH) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY, started_at REAL NOT NULL, finished_at REAL NOT NULL, "
+                "full_sweep INTEGER NOT NULL, added INTEGER NOT NULL, changed INTEGER NOT NULL, removed INTEGER NOT NULL, live INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS versions (listing_id TEXT NOT NULL, run_id INTEGER NOT NULL, record TEXT, "
+                "PRIMARY KEY (listing_id, run_id)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_versions_run ON versions(run_id)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS heads (listing_id TEXT PRIMARY KEY, run_id INTEGER NOT NULL, record TEXT) WITHOUT ROWID")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, data BLOB NOT NULL) WITHOUT ROWID")
+
+    # Encoding
+
+    def _encode(self, listing: Listing, new_blobs: Dict[str, bytes]) -> str:
+        record = {}
+        for name in ARCHIVED_FIELDS:
+            value = getattr(listing, name)
+            if value is None:
+                continue
+            if name == "description":
+                digest = description_hash(value)
+                new_blobs.setdefault(digest, value.encode("utf-8"))
+                value = digest
+            record[name] = value
+        return json.dumps(record, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+    def _read_blobs(self, digests: Iterable[str]) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        for chunk in _chunks(list(set(digests))):
+            marks = ", ".join("?" for _ in chunk)
+            for digest, data in self._conn.execute(f"SELECT hash, data FROM blobs WHERE hash IN ({marks})", chunk):
+                out[digest] = zlib.decompress(data).decode("utf-8")
+        return out
+
+    def _decode(self, records: List[Tuple[str, str]], with_descriptions: bool) -> Dict[str, Listing]:
+        parsed = [(lid, json.loads(raw)) for lid, raw in records]
+        texts = self._read_blobs(r["description"] for _, r in parsed if "description" in r) if with_descriptions else {}
+        out: Dict[str, Listing] = {}
+        for lid, r in parsed:
+            if "description" in r:
+                r["description"] = texts.get(r["description"])
+            out[lid] = Listing(**{k: v for k, v in r.items() if k in ARCHIVED_FIELDS})
+        return out
+
+    # Writing
+
+    def is_empty(self) -> bool:
+        return self._conn.execute("SELECT 1 FROM runs LIMIT 1").fetchone() is None
+
+    def _heads(self, ids: List[str]) -> Dict[str, Optional[str]]:
+        out: Dict[str, Optional[str]] = {}
+        for chunk in _chunks(ids):
+            marks = ", ".join("?" for _ in chunk)
+            out.update(self._conn.execute(f"SELECT listing_id, record FROM heads WHERE listing_id IN ({marks})", chunk).fetchall())
+        return out
+
+    def _write(self, rows: List[Tuple[str, int, Optional[str]]], new_blobs: Dict[str, bytes]) -> None:
+        if not rows:
+            return
+        known = {d for chunk in _chunks(new_blobs) for (d,) in self._conn.execute(
+            f"SELECT hash FROM blobs WHERE hash IN ({', '.join('?' for _ in chunk)})", chunk)}
+        self._conn.executemany(
+            "INSERT INTO blobs (hash, data) VALUES (?, ?)",
+            [(d, zlib.compress(text, 9)) for d, text in new_blobs.items() if d not in known],
+        )
+        self._conn.executemany("INSERT INTO versions (listing_id, run_id, record) VALUES (?, ?, ?)", rows)
+        self._conn.executemany(
+            "INSERT INTO heads (listing_id, run_id, record) VALUES (?, ?, ?) "
+            "ON CONFLICT(listing_id) DO UPDATE SET run_id = excluded.run_id, record = excluded.record",
+            rows,
+        )
+
+    def append_run(self, listings: Iterable[Listing], seen_ids: Optional[Set[str]] = None, full_sweep: bool = False,
+                   started_at: Optional[float] = None) -> int:
+        finished = time.time()
+        added = changed = 0
+        archived: Set[str] = set()
+        with self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO runs (started_at, finished_at, full_sweep, added, changed, removed, live) VALUES (?, ?, ?, 0, 0, 0, 0)",
+                (started_at or finished, finished, int(full_sweep)),
+            )
+            run_id = cur.lastrowid
+            # Listings are consumed a chunk at a time, so a large run never holds every record at once
+            for chunk in _chunks(listings):
+                new_blobs: Dict[str, bytes] = {}
+                encoded = {l.id: self._encode(l, new_blobs) for l in chunk}
+                archived.update(encoded)
+                heads = self._heads(list(encoded))
+                fresh = [lid for lid in encoded if heads.get(lid) is None]
+                moved = [lid for lid in encoded if heads.get(lid) is not None and heads[lid] != encoded[lid]]
+                added += len(fresh)
+                changed += len(moved)
+                self._write([(lid, run_id, encoded[lid]) for lid in fresh + moved], new_blobs)
+            removed: List[str] = []
+            if seen_ids is not None:
+                # Only a crawl that reached every page can tell that a listing is gone
+                live = {r[0] for r in self._conn.execute("SELECT listing_id FROM heads WHERE record IS NOT NULL")}
+                removed = sorted(live - seen_ids - archived)
+                self._write([(lid, run_id, None) for lid in removed], {})
+            live_count = self._conn.execute("SELECT COUNT(*) FROM heads WHERE record IS NOT NULL").fetchone()[0]
+            self._conn.execute(
+                "UPDATE runs SET added = ?, changed = ?, removed = ?, live = ? WHERE run_id = ?",
+                (added, changed, len(removed), live_count, run_id),
+            )
+        return run_id
+
+    # Queries
+
+    def runs(self, limit: Optional[int] = None) -> List[ArchivedRun]:
+        sql = "SELECT run_id, started_at, finished_at, full_sweep, added, changed, removed, live FROM runs ORDER BY run_id DESC"
+        rows = self._conn.execute(sql + (" LIMIT ?" if limit else ""), (limit,) if limit else ()).fetchall()
+        return [ArchivedRun(r[0], r[1], r[2], bool(r[3]), r[4], r[5], r[6], r[7]) for r in rows]
+
+    def run_at(self, when: float) -> Optional[int]:
+        """The last run that finished at or before the given Unix time."""
+        row = self._conn.execute("SELECT MAX(run_id) FROM runs WHERE finished_at <= ?", (when,)).fetchone()
+        return row[0] if row else None
+
+    def as_of(self, run_id: int, with_descriptions: bool = True) -> List[Listing]:
+        """Every listing as it stood after run_id, without the ones removed by then."""
+        rows = self._conn.execute(
+            "SELECT v.listing_id, v.record FROM versions v "
+            "JOIN (SELECT listing_id, MAX(run_id) AS last FROM versions WHERE run_id <= ? GROUP BY listing_id) h "
+            "ON v.listing_id = h.listing_id AND v.run_id = h.last WHERE v.record IS NOT NULL",
+            (run_id,),
+        ).fetchall()
+        return list(self._decode(rows, with_descriptions).values())
+
+    def history(self, listing_id: str, with_descriptions: bool = True) -> List[Tuple[int, Optional[Listing]]]:
+        """(run_id, listing) for every version of one listing, oldest first; None marks a removal."""
+        rows = self._conn.execute(
+            "SELECT run_id, record FROM versions WHERE listing_id = ? ORDER BY run_id", (listing_id,)
+        ).fetchall()
+        decoded = self._decode([(str(run_id), raw) for run_id, raw in rows if raw is not None], with_descriptions)
+        return [(run_id, decoded.get(str(run_id))) for run_id, _ in rows]
+
+    def size_bytes(self) -> int:
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        return page_size * pages
+
+    def close(self) -> None:
+        self._conn.close()
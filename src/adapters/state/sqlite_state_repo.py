@@ -0,0 +1,289 @@
+import json
+import os
+import sqlite3
+import time
+from dataclasses import fields
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, get_args, get_type_hints
+from ...domain.fingerprint import Fingerprint, fingerprint_of
+from ...domain.models import Listing, persisted_fields
+from ...domain.near_duplicates import SIGNATURE_VERSION, Signature, band_keys, listing_signature, pack_signature, same_agency, similarity, unpack_signature
+from ...domain.ports import StateRepositoryPort
+
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "..", "data", "state.sqlite3")
+DB_PATH = os.path.abspath(DB_PATH)
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+_CHUNK = 500
+
+
+def _column_type(hint: Any) -> str:
+    args = [a for a in get_args(hint) if a is not type(None)] or [hint]
+    base = args[0]
+    if base in (bool, int):
+        return "INTEGER"
+    if base is float:
+        return "REAL"
+    return "TEXT"
+
+
+def _listing_columns() -> Dict[str, str]:
+    hints = get_type_hints(Listing)
+    return {name: _column_type(hints[name]) for name in persisted_fields()}
+
+
+def _chunks(values: List[str]) -> Iterator[List[str]]:
+    for i in range(0, len(values), _CHUNK):
+        yield values[i:i + _CHUNK]
+
+
+class SqliteStateRepository(StateRepositoryPort):
+    """Listing state in SQLite (WAL) with row-level upserts and indexed id/url lookups."""
+
+    def __init__(self, path: str = DB_PATH) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._columns = _listing_columns()
+        self._bool_columns = {name for name, hint in get_type_hints(Listing).items() if name in self._columns and bool in (get_args(hint) or (hint,))}
+        self._create_schema()
+        self._signatures_backfilled = False
+
+    def _create_schema(self) -> None:
+        cols = ",\n".join(
+            f"{name} {ctype} PRIMARY KEY" if name == "id" else f"{name} {ctype}"
+            for name, ctype in self._columns.items()
+        )
+        with self._conn:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS listings (\n{cols},\nupdated_at REAL\n)")
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(listings)")}
+            # Fields added to Listing after the table was created become nullable columns
+            for name, ctype in self._columns.items():
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE listings ADD COLUMN {name} {ctype}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_listings_detail_url ON listings(detail_url)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            # MinHash signature per listing plus one LSH bucket row per band, for near-duplicate lookups
+            self._conn.execute("CREATE TABLE IF NOT EXISTS minhash (id TEXT PRIMARY KEY, signature BLOB NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS lsh_buckets (bucket INTEGER NOT NULL, id TEXT NOT NULL, PRIMARY KEY (bucket, id)) WITHOUT ROWID")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_buckets_id ON lsh_buckets(id)")
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'minhash_version'").fetchone()
+            if row is None or row[0] != str(SIGNATURE_VERSION):
+                # Signatures from an older shingling are not comparable; the first lookup signs everything again
+                self._conn.execute("DELETE FROM lsh_buckets")
+                self._conn.execute("DELETE FROM minhash")
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('minhash_version', ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (str(SIGNATURE_VERSION),),
+                )
+
+    def _to_listing(self, row: sqlite3.Row) -> Listing:
+        values = {name: row[name] for name in row.keys() if name in self._columns}
+        for name in self._bool_columns:
+            if values[name] is not None:
+                values[name] = bool(values[name])
+        return Listing(**values)
+
+    def _select(self, where: str = "", params: Iterable[Any] = ()) -> List[Listing]:
+        self._conn.row_factory = sqlite3.Row
+        try:
+            cols = ", ".join(self._columns)
+            rows = self._conn.execute(f"SELECT {cols} FROM listings {where}", tuple(params)).fetchall()
+        finally:
+            self._conn.row_factory = None
+        return [self._to_listing(r) for r in rows]
+
+    def load_last_snapshot(self) -> List[Listing]:
+        return self._select()
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+
+    def _upsert_sql(self) -> str:
+        names = list(self._columns)
+        placeholders = ", ".join("?" for _ in names)
+        optional = {f.name for f in fields(Listing) if f.default is None}
+        assignments = []
+        changed = []
+        for name in names:
+            if name == "id":
+                continue
+            if name in optional:
+                # None on the incoming row keeps what is stored
+                assignments.append(f"{name} = COALESCE(excluded.{name}, listings.{name})")
+                changed.append(f"(excluded.{name} IS NOT NULL AND excluded.{name} IS NOT listings.{name})")
+            else:
+                assignments.append(f"{name} = excluded.{name}")
+                changed.append(f"excluded.{name} IS NOT listings.{name}")
+        assignments.append("updated_at = excluded.updated_at")
+        return (
+            f"INSERT INTO listings ({', '.join(names)}, updated_at) VALUES ({placeholders}, ?) "
+            f"ON CONFLICT(id) DO UPDATE SET {', '.join(assignments)} "
+            f"WHERE {' OR '.join(changed)}"
+        )
+
+    def _rows(self, listings: List[Listing]) -> List[tuple]:
+        now = time.time()
+        return [tuple(getattr(l, name) for name in self._columns) + (now,) for l in listings]
+
+    def upsert_listings(self, listings: List[Listing]) -> None:
+        if not listings:
+            return
+        with self._conn:
+            self._conn.executemany(self._upsert_sql(), self._rows(listings))
+
+    def save_snapshot(self, listings: List[Listing]) -> None:
+        ids = [l.id for l in listings]
+        with self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (id TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM keep_ids")
+            self._conn.executemany("INSERT OR IGNORE INTO keep_ids (id) VALUES (?)", [(i,) for i in ids])
+            self._conn.execute("DELETE FROM listings WHERE id NOT IN (SELECT id FROM keep_ids)")
+            self._conn.execute("DELETE FROM lsh_buckets WHERE id NOT IN (SELECT id FROM keep_ids)")
+            self._conn.execute("DELETE FROM minhash WHERE id NOT IN (SELECT id FROM keep_ids)")
+            self._conn.executemany(self._upsert_sql(), self._rows(listings))
+            self._conn.execute("DELETE FROM keep_ids")
+
+    def known_ids(self, ids: Iterable[str]) -> Set[str]:
+        wanted = list(set(ids))
+        found: Set[str] = set()
+        for chunk in _chunks(wanted):
+            marks = ", ".join("?" for _ in chunk)
+            found.update(r[0] for r in self._conn.execute(f"SELECT id FROM listings WHERE id IN ({marks})", chunk))
+        return found
+
+    def known_urls(self, urls: Iterable[str]) -> Set[str]:
+        wanted = list(set(urls))
+        found: Set[str] = set()
+        for chunk in _chunks(wanted):
+            marks = ", ".join("?" for _ in chunk)
+            found.update(r[0] for r in self._conn.execute(f"SELECT detail_url FROM listings WHERE detail_url IN ({marks})", chunk))
+        return found
+
+    def get_listings(self, ids: Iterable[str]) -> Dict[str, Listing]:
+        out: Dict[str, Listing] = {}
+        for chunk in _chunks(list(set(ids))):
+            marks = ", ".join("?" for _ in chunk)
+            for l in self._select(f"WHERE id IN ({marks})", chunk):
+                out[l.id] = l
+        return out
+
+    def get_fingerprints(self, ids: Iterable[str]) -> Dict[str, Fingerprint]:
+        out: Dict[str, Fingerprint] = {}
+        # Descriptions are only read for legacy rows that have no stored detail hash yet
+        cols = "id, title, agency, category, status, detail_url, relevant, row_hash, detail_hash, " \
+               "CASE WHEN detail_hash IS NULL THEN description END AS description"
+        self._conn.row_factory = sqlite3.Row
+        try:
+            for chunk in _chunks(list(set(ids))):
+                marks = ", ".join("?" for _ in chunk)
+                for row in self._conn.execute(f"SELECT {cols} FROM listings WHERE id IN ({marks})", chunk):
+                    out[row["id"]] = fingerprint_of(self._to_listing(row))
+        finally:
+            self._conn.row_factory = None
+        return out
+
+    def labelled_listings(self, source: Optional[str] = None) -> List[Listing]:
+        if source is None:
+            return self._select("WHERE relevant IS NOT NULL")
+        return self._select("WHERE relevant IS NOT NULL AND relevance_source = ?", (source,))
+
+    def label_version(self, source: Optional[str] = None) -> str:
+        # updated_at only moves when a stored field changes, so an unchanged label set keeps its version
+        where, params = ("WHERE relevant IS NOT NULL", ()) if source is None else ("WHERE relevant IS NOT NULL AND relevance_source = ?", (source,))
+        count, last = self._conn.execute(f"SELECT COUNT(*), MAX(updated_at) FROM listings {where}", params).fetchone()
+        return f"{count}:{last}"
+
+    def reset(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM listings")
+            self._conn.execute("DELETE FROM lsh_buckets")
+            self._conn.execute("DELETE FROM minhash")
+
+    def index_signatures(self, listings: List[Listing]) -> None:
+        signatures = [(l.id, sig) for l in listings if (sig := listing_signature(l)) is not None]
+        if not signatures:
+            return
+        with self._conn:
+            for chunk in _chunks([lid for lid, _ in signatures]):
+                self._conn.execute(f"DELETE FROM lsh_buckets WHERE id IN ({', '.join('?' for _ in chunk)})", chunk)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO minhash (id, signature) VALUES (?, ?)",
+                [(lid, pack_signature(sig)) for lid, sig in signatures],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO lsh_buckets (bucket, id) VALUES (?, ?)",
+                [(key, lid) for lid, sig in signatures for key in band_keys(sig)],
+            )
+
+    def _backfill_signatures(self) -> None:
+        # Listings stored before the index existed are signed once, in chunks. Paged by id, since text too short
+        # to sign never gets a signature and would otherwise be selected again.
+        last_id = ""
+        while True:
+            missing = self._select(
+                "WHERE id > ? AND description IS NOT NULL AND description != '' AND id NOT IN (SELECT id FROM minhash) "
+                "ORDER BY id LIMIT ?", (last_id, _CHUNK),
+            )
+            if not missing:
+                break
+            last_id = missing[-1].id
+            self.index_signatures(missing)
+            print(f"[state] Indexed {len(missing)} stored listing(s) for near-duplicate detection")
+        self._signatures_backfilled = True
+
+    def find_near_duplicate(self, signature: Signature, threshold: float, exclude: Iterable[str] = (),
+                            agency: Optional[str] = None) -> Optional[Tuple[Listing, float]]:
+        if not self._signatures_backfilled:
+            self._backfill_signatures()
+        keys = band_keys(signature)
+        excluded = set(exclude)
+        candidates = [
+            r[0] for r in self._conn.execute(
+                f"SELECT DISTINCT id FROM lsh_buckets WHERE bucket IN ({', '.join('?' for _ in keys)})", keys
+            ) if r[0] not in excluded
+        ]
+        best: Optional[Tuple[str, float]] = None
+        for chunk in _chunks(candidates):
+            marks = ", ".join("?" for _ in chunk)
+            rows = self._conn.execute(
+                f"SELECT m.id, m.signature, l.agency FROM minhash m JOIN listings l ON l.id = m.id WHERE m.id IN ({marks})", chunk
+            )
+            for lid, blob, other_agency in rows:
+                if agency is not None and not same_agency(agency, other_agency):
+                    continue
+                score = similarity(signature, unpack_signature(blob))
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (lid, score)
+        if best is None:
+            return None
+        match = self.get_listings([best[0]]).get(best[0])
+        return (match, best[1]) if match is not None else None
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._conn:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def migrate_json_state(json_path: str, repo: SqliteStateRepository) -> int:
+    """One-time import of a JsonStateRepository file; returns the number of listings imported."""
+    if repo.get_meta("migrated_from_json"):
+        return 0
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        return 0
+    known = set(persisted_fields())
+    listings = [Listing(**{k: v for k, v in item.items() if k in known}) for item in raw]
+    repo.upsert_listings(listings)
+    repo.set_meta("migrated_from_json", json_path)
+    return len(listings)
@@ -0,0 +1,73 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+from ...domain.models import Listing, ProgressEntry, persisted_fields, to_record
+from ...domain.ports import SyncJournalPort
+
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "..", "data", "sync_journal.sqlite3")
+JOURNAL_PATH = os.path.abspath(JOURNAL_PATH)
+
+STAGES = ("enriched", "classified", "sending", "notified")
+
+
+class SqliteSyncJournal(SyncJournalPort):
+    """Progress journal in its own SQLite file, one row per listing of the current run.
+
+    Every record() is a single transaction with synchronous=FULL, so a stage reported done survives a crash or
+    power loss. The journal only ever holds the listings of one run and is cleared once state has been saved.
+    """
+
+    def __init__(self, path: str = JOURNAL_PATH) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # A notification marked as sent must not be lost, so commits wait for the disk
+        self._conn.execute("PRAGMA synchronous=FULL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS progress ("
+                "id TEXT PRIMARY KEY, stage TEXT NOT NULL, listing TEXT NOT NULL, verdict INTEGER, updated_at REAL NOT NULL)"
+            )
+
+    def record(self, stage: str, listings: List[Listing], verdicts: Optional[Dict[str, Optional[bool]]] = None) -> None:
+        if stage not in STAGES:
+            raise ValueError(f"unknown journal stage: {stage}")
+        if not listings:
+            return
+        now = time.time()
+        rows = []
+        for l in listings:
+            payload = to_record(l)
+            payload["changes"] = list(l.changes)
+            verdict = verdicts.get(l.id) if verdicts is not None else None
+            rows.append((l.id, stage, json.dumps(payload, ensure_ascii=False), None if verdict is None else int(verdict), now))
+        with self._conn:
+            if verdicts is None:
+                # Later stages keep the verdict recorded when the listing was classified
+                self._conn.executemany(
+                    "INSERT INTO progress (id, stage, listing, verdict, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET stage = excluded.stage, listing = excluded.listing, updated_at = excluded.updated_at",
+                    rows,
+                )
+            else:
+                self._conn.executemany("INSERT OR REPLACE INTO progress (id, stage, listing, verdict, updated_at) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def load(self) -> Dict[str, ProgressEntry]:
+        known = set(persisted_fields())
+        out: Dict[str, ProgressEntry] = {}
+        for lid, stage, raw, verdict in self._conn.execute("SELECT id, stage, listing, verdict FROM progress"):
+            payload = json.loads(raw)
+            changes = tuple(payload.pop("changes", ()))
+            listing = Listing(**{k: v for k, v in payload.items() if k in known}, changes=changes)
+            out[lid] = ProgressEntry(stage, listing, None if verdict is None else bool(verdict))
+        return out
+
+    def clear(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM progress")
+
+    def close(self) -> None:
+        self._conn.close()
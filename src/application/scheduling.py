@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+from .service import SyncResult, SyncService
+
+
+def parse_business_hours(spec: str) -> Optional[Tuple[int, int]]:
+    """Parse "7-18" into (7, 18); an empty spec disables business hours."""
+    spec = spec.strip()
+    if not spec:
+        return None
+    start, _, end = spec.partition("-")
+    hours = (int(start), int(end))
+    if not (0 <= hours[0] < hours[1] <= 24):
+        raise ValueError(f"BUSINESS_HOURS must look like 7-18, got {spec!r}")
+    return hours
+
+
+class AdaptiveInterval:
+    """Polling interval that follows how often new listings have been appearing.
+
+    Each run's new+changed count feeds an exponentially weighted average. While it stays at one listing per run
+    or more, the interval halves towards min_s; quiet runs stretch it by half towards max_s. On weekdays inside
+    business hours it is also capped at base_s, since that is when agencies post.
+    """
+
+    def __init__(self, base_s: float, min_s: float, max_s: float, business_hours: Optional[Tuple[int, int]] = None,
+                 smoothing: float = 0.5) -> None:
+        self.min_s = max(1.0, min(min_s, max_s))
+        self.max_s = max(self.min_s, max_s)
+        self.base_s = min(max(base_s, self.min_s), self.max_s)
+        self.business_hours = business_hours
+        self.smoothing = smoothing
+        self.activity = 0.0
+        self.seconds = self.base_s
+
+    def in_business_hours(self, now: datetime) -> bool:
+        if self.business_hours is None:
+            return False
+        return now.weekday() < 5 and self.business_hours[0] <= now.hour < self.business_hours[1]
+
+    def record(self, activity: int, now: Optional[datetime] = None) -> float:
+        """Fold in one run's activity and return the seconds to wait before the next run."""
+        now = now or datetime.now()
+        self.activity = self.smoothing * activity + (1 - self.smoothing) * self.activity
+        if self.activity >= 1.0:
+            seconds = self.seconds / 2
+        else:
+            seconds = self.seconds * 1.5
+        ceiling = self.base_s if self.in_business_hours(now) else self.max_s
+        self.seconds = min(max(seconds, self.min_s), ceiling)
+        return self.seconds
+
+
+class SyncRunner:
+    """Runs one sync at a time against a long-lived SyncService and adapts the interval to the results."""
+
+    def __init__(self, service: SyncService, interval: AdaptiveInterval,
+                 on_interval_change: Optional[Callable[[float], None]] = None) -> None:
+        self.service = service
+        self.interval = interval
+        self.on_interval_change = on_interval_change
+        self._running = asyncio.Lock()
+
+    async def run(self) -> Optional[SyncResult]:
+        if self._running.locked():
+            # A slow run is still going; the next tick would crawl and post the same items
+            print("[scheduler] Previous sync still running; skipping this tick.")
+            return None
+        async with self._running:
+            try:
+                result = await self.service.sync_once()
+            except Exception as e:
+                print(f"[scheduler] Sync failed: {e!r}; keeping the {self.interval.seconds / 60:.0f} min interval")
+                return None
+        previous = self.interval.seconds
+        seconds = self.interval.record(result.activity)
+        print(
+            f"[scheduler] {result.activity} new/changed listing(s) in {result.duration_s:.1f}s; "
+            f"next sync in {seconds / 60:.0f} min (activity {self.interval.activity:.1f}/run)"
+        )
+        if seconds != previous and self.on_interval_change is not None:
+            self.on_interval_change(seconds)
+        return result
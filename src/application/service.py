@@ -1,74 +1,449 @@
-from typing import List, Dict
-from ..domain.models import Listing
-from ..domain.ports import ListingsScraperPort, NotifierPort, StateRepositoryPort, ClassifierPort
+import asyncio
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Set, Tuple, Union
+from ..domain.diff import ChangeKind, diff_rows, with_detail_changes
+from ..domain.fingerprint import Fingerprint
+from ..domain.models import Listing, ProgressEntry
+from ..domain.near_duplicates import listing_signature
+from ..domain.ports import ListingsScraperPort, NotifierPort, PartialDeliveryError, StateRepositoryPort, ClassifierPort, SyncJournalPort, SnapshotArchivePort
+from ..infrastructure.config import settings
+from ..infrastructure.metrics import metrics
+
+class _Done:
+    """Type of the end-of-stream marker, so queues can be typed as carrying listings or the marker."""
+
+
+# Marks the end of a pipeline stage's output
+_DONE = _Done()
+# What flows between pipeline stages
+_Item = Union[Listing, _Done]
+
+
+def _enrich_lanes(sources: int) -> Tuple[int, int, int]:
+    """Batch size, batches in flight per source, and batches waiting or running across all sources.
+
+    A batch is as many detail pages as one source may fetch at once: its share of MAX_CONCURRENT_REQUESTS,
+    capped by ENRICH_CONCURRENCY, which bounds each scraper's own client. A lane runs that batch and starts
+    the next while the slowest page of the first is still loading; each lane may have one more batch queued.
+    """
+    sources = max(1, sources)
+    batch_size = max(1, min(settings.enrich_concurrency, settings.max_concurrent_requests // sources))
+    lane_width = 2
+    return batch_size, lane_width, sources * (lane_width + 1)
+
+
+# Finished listings written to state per upsert
+_SAVE_BATCH = 200
+
+# Changes that can flip relevance and therefore need a fresh classification
+_RECLASSIFY_ON = {"title", "description"}
+
+LAST_FULL_SWEEP_KEY = "last_full_sweep"
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    new: int
+    changed: int
+    unchanged: int
+    relevant: int
+    sent: int
+    amendments: int
+    enrich_failed: int
+    classify_failed: int
+    full_sweep: bool
+    stopped_early: bool
+    duration_s: float
+
+    @property
+    def activity(self) -> int:
+        """Listings that appeared or changed since the previous run."""
+        return self.new + self.changed
 
 
 class SyncService:
-    def __init__(self, scraper: ListingsScraperPort, notifier: NotifierPort, state_repo: StateRepositoryPort, classifier: ClassifierPort | None = None) -> None:
+    def __init__(self, scraper: ListingsScraperPort, notifier: NotifierPort, state_repo: StateRepositoryPort, classifier: ClassifierPort | None = None,
+                 journal: SyncJournalPort | None = None, archive: SnapshotArchivePort | None = None) -> None:
         self.scraper = scraper
         self.notifier = notifier
         self.state_repo = state_repo
         self.classifier = classifier
+        self.journal = journal
+        self.archive = archive
 
-    def _index_by_id(self, listings: List[Listing]) -> Dict[str, Listing]:
-        return {l.id: l for l in listings}
+    async def _drain_batch(self, queue: "asyncio.Queue[_Item]", limit: int) -> Tuple[List[Listing], bool]:
+        """Up to limit listings, and whether the end-of-stream marker came with them."""
+        # Block for the first item, then take whatever else is already waiting
+        batch: List[Listing] = []
+        item = await queue.get()
+        while True:
+            if isinstance(item, _Done):
+                return batch, True
+            batch.append(item)
+            if len(batch) >= limit or queue.empty():
+                return batch, False
+            item = queue.get_nowait()
 
-    async def sync_once(self) -> None:
-        print("[sync] Fetching current IT listings…")
-        current = self.scraper.fetch_it_listings()
-        print(f"[sync] Found {len(current)} IT listings.")
+    def _full_sweep_due(self) -> bool:
+        if settings.incremental_stop_after_pages <= 0:
+            return True
+        last = self.state_repo.get_meta(LAST_FULL_SWEEP_KEY)
+        try:
+            return last is None or time.time() - float(last) >= settings.full_sweep_interval_hours * 3600
+        except ValueError:
+            return True
 
-        previous = self.state_repo.load_last_snapshot()
-        print(f"[sync] Loaded previous snapshot with {len(previous)} listings.")
+    def _recover(self) -> Dict[str, ProgressEntry]:
+        """Save what an interrupted run already finished and return the enriched/classified work it left behind."""
+        if self.journal is None:
+            return {}
+        entries = self.journal.load()
+        if not entries:
+            return {}
+        finished = [
+            e.listing for e in entries.values()
+            if e.stage in ("sending", "notified") or (e.stage == "classified" and e.verdict is False)
+        ]
+        # Saved now, so this run's crawl sees them as known and neither re-enriches nor re-posts them
+        self.state_repo.upsert_listings(finished)
+        pending = {i: e for i, e in entries.items() if e.stage in ("enriched", "classified") and e.verdict is not False}
+        uncertain = sum(1 for e in entries.values() if e.stage == "sending")
+        print(f"[sync] Resuming an interrupted run: saved {len(finished)} finished listing(s), {len(pending)} enriched or classified listing(s) to reuse.")
+        if uncertain:
+            # Delivery was started but never confirmed; posting again could duplicate it
+            print(f"[sync] {uncertain} listing(s) were being sent when the run stopped; treating them as sent.")
+        metrics.inc("journal_recovered", len(finished), outcome="finished")
+        metrics.inc("journal_recovered", len(pending), outcome="pending")
+        return pending
 
-        prev_by_id = self._index_by_id(previous)
-        # Build seen sets to skip anything we've already crawled
-        seen_ids = {p.id for p in previous}
-        seen_urls = {p.detail_url for p in previous}
+    def _near_duplicate(self, listing: Listing) -> Optional[Listing]:
+        """An earlier, already classified listing that this new one reposts or amends."""
+        if not settings.near_duplicates:
+            return None
+        signature = listing_signature(listing)
+        if signature is None:
+            return None
+        # Same agency only: one title and boilerplate under two agencies are two different solicitations
+        match = self.state_repo.find_near_duplicate(signature, settings.near_duplicate_threshold, exclude=[listing.id], agency=listing.agency)
+        if match is None or match[0].relevant is None:
+            return None
+        return match[0]
 
-        # Only process truly new items; skip enrichment/classification for anything already seen by id or url
-        to_enrich: List[Listing] = [l for l in current if (l.id not in seen_ids and l.detail_url not in seen_urls)]
-        print(f"[sync] New items to process: {len(to_enrich)}; skipping {len(current) - len(to_enrich)} already-seen.")
+    async def sync_once(self) -> SyncResult:
+        metrics.start_run()
+        counts = {"new": 0, "changed": 0, "unchanged": 0, "relevant": 0, "sent": 0, "amendments": 0, "enrich_failed": 0, "classify_failed": 0}
+        try:
+            return await self._sync(counts)
+        finally:
+            for kind, n in counts.items():
+                metrics.inc("listings", n, kind=kind)
+            metrics.finish_run(dict(counts))
 
-        enriched_new = [self.scraper.enrich_description(l) for l in to_enrich]
-        print("[sync] Enrichment complete.")
+    async def _timed_stage(self, name: str, stage) -> None:
+        with metrics.span("sync_stage", stage=name):
+            await stage
 
-        # Classify and send only new URLs
-        to_send: List[Listing] = enriched_new
-        if enriched_new and self.classifier is not None:
-            print("[sync] Classifying new listings for relevance…")
-            filtered: List[Listing] = []
-            for l in enriched_new:
-                try:
-                    if await self.classifier.is_relevant(l):
-                        filtered.append(l)
-                except Exception as e:
-                    print(f"[sync] Classifier error for {l.id}: {e}")
-            print(f"[sync] {len(filtered)}/{len(enriched_new)} new listings deemed relevant.")
-            to_send = filtered
-
-        if to_send:
-            print("[sync] Sending relevant listings to notifier…")
-            await self.notifier.send_listings(to_send)
-
-        # Persist snapshot as union of previous and current; reuse previous descriptions for already-seen items
-        latest_by_id = {l.id: l for l in previous}
-        # First, ensure all current items are present; reuse prev.description when not enriched
-        enriched_by_id = {l.id: l for l in enriched_new}
-        for cur in current:
-            if cur.id in enriched_by_id:
-                latest_by_id[cur.id] = enriched_by_id[cur.id]
+    def _archive_run(self, ids: List[str], seen_ids: Optional[Set[str]], full_sweep: bool, started_at: float) -> None:
+        assert self.archive is not None
+        with metrics.span("archive_run"):
+            if self.archive.is_empty():
+                # The first archived run starts from everything already tracked, so later runs only add deltas
+                listings = self.state_repo.load_last_snapshot()
             else:
-                prev = prev_by_id.get(cur.id)
-                latest_by_id[cur.id] = Listing(
-                    id=cur.id,
-                    title=cur.title,
-                    agency=cur.agency,
-                    category=cur.category,
-                    status=cur.status,
-                    detail_url=cur.detail_url,
-                    description=(prev.description if prev else None),
-                )
-        print("[sync] Saving snapshot…")
-        self.state_repo.save_snapshot(list(latest_by_id.values()))
-        print("[sync] Snapshot saved.")
+                # Stored rather than in-flight records, so the archive sees the merged state that was saved. Read in
+                # chunks as the archive consumes them, so a large run is never loaded at once.
+                listings = (l for i in range(0, len(ids), _SAVE_BATCH) for l in self.state_repo.get_listings(ids[i:i + _SAVE_BATCH]).values())
+            run_id = self.archive.append_run(listings, seen_ids=seen_ids, full_sweep=full_sweep, started_at=started_at)
+        print(f"[sync] Archived run {run_id}.")
+
+    async def _sync(self, counts: Dict[str, int]) -> SyncResult:
+        started = time.monotonic()
+        started_at = time.time()
+        # Work journaled by an interrupted run; entries are dropped once the crawl shows the row changed since
+        resumed = self._recover()
+        # Incremental runs stop paging once results are all known; a periodic full sweep catches reordered items
+        full_sweep = self._full_sweep_due()
+        stopped_early = False
+        seen_total = 0
+        # Every id on the pages crawled, including unchanged ones
+        seen_ids: Set[str] = set()
+        # New and changed listings in flight between enrichment and the end of the pipeline
+        processed: Dict[str, Listing] = {}
+        # Finished listings are written to state in batches as they leave the pipeline; only their ids stay behind
+        unsaved: List[Listing] = []
+        saved_ids: List[str] = []
+        stored_fps: Dict[str, Fingerprint] = {}
+        revalidating: Set[str] = set()
+
+        def persist(listings: List[Listing], flush: bool = False) -> None:
+            for l in listings:
+                processed.pop(l.id, None)
+            unsaved.extend(listings)
+            if not unsaved or (not flush and len(unsaved) < _SAVE_BATCH):
+                return
+            with metrics.span("save_state"):
+                self.state_repo.upsert_listings(unsaved)
+                if settings.near_duplicates:
+                    self.state_repo.index_signatures(unsaved)
+            saved_ids.extend(l.id for l in unsaved)
+            unsaved.clear()
+
+        size = max(1, settings.pipeline_queue_size)
+        enrich_q: "asyncio.Queue[_Item]" = asyncio.Queue(maxsize=size)
+        classify_q: "asyncio.Queue[_Item]" = asyncio.Queue(maxsize=size)
+        notify_q: "asyncio.Queue[_Item]" = asyncio.Queue(maxsize=size)
+
+        async def crawl_and_dedupe() -> None:
+            nonlocal seen_total, stopped_early
+            print(f"[sync] Fetching current IT listings ({'full sweep' if full_sweep else 'incremental'})…")
+            queued = seen_ids
+            # Consecutive pages of known listings, per source when the scraper combines several
+            known_streaks: Dict[str, int] = {}
+            try:
+                async with aclosing(self.scraper.iter_listing_pages(full_sweep=full_sweep)) as pages:
+                    async for page in pages:
+                        page = [l for l in page if l.id not in queued]
+                        if not page:
+                            continue
+                        seen_total += len(page)
+                        fingerprints = self.state_repo.get_fingerprints(l.id for l in page)
+                        source = self.scraper.source_of(page[0])
+                        known_streak = known_streaks.get(source, 0) + 1 if len(fingerprints) == len(page) else 0
+                        known_streaks[source] = known_streak
+                        diffs = diff_rows(page, fingerprints)
+                        # A new id at an already-known detail url is the same listing; skip it as before
+                        known_urls = self.state_repo.known_urls(d.listing.detail_url for d in diffs if d.kind is ChangeKind.NEW)
+                        backfill: List[Listing] = []
+                        for d in diffs:
+                            l = d.listing
+                            queued.add(l.id)
+                            if d.kind is ChangeKind.UNCHANGED:
+                                entry = resumed.get(l.id)
+                                if entry is not None and entry.listing.row_hash == l.row_hash:
+                                    # A description change found by a full sweep that was interrupted
+                                    counts["changed"] += 1
+                                    await enrich_q.put(entry.listing)
+                                    continue
+                                counts["unchanged"] += 1
+                                if d.stored is not None and not d.stored.persisted:
+                                    backfill.append(replace(l, detail_hash=d.stored.detail))
+                                if full_sweep and settings.revalidate_details and d.stored is not None and d.stored.detail is not None:
+                                    # The grid row does not show the description, so a full sweep rechecks the detail page;
+                                    # through the HTTP cache that is a conditional request, and an unchanged page is not parsed
+                                    stored_fps[l.id] = d.stored
+                                    revalidating.add(l.id)
+                                    await enrich_q.put(l)
+                                continue
+                            if d.kind is ChangeKind.NEW and l.detail_url in known_urls:
+                                counts["unchanged"] += 1
+                                continue
+                            if d.kind is ChangeKind.CHANGED:
+                                counts["changed"] += 1
+                                assert d.stored is not None
+                                stored_fps[l.id] = d.stored
+                            else:
+                                counts["new"] += 1
+                            entry = resumed.get(l.id)
+                            if entry is not None and entry.listing.row_hash == l.row_hash:
+                                l = entry.listing
+                            else:
+                                resumed.pop(l.id, None)
+                            await enrich_q.put(l)
+                        # Rows saved before fingerprints existed get them once, so later runs skip the fallback
+                        self.state_repo.upsert_listings(backfill)
+                        if not full_sweep and known_streak >= settings.incremental_stop_after_pages:
+                            # Newest listings come first, so the remaining pages hold nothing unseen
+                            stopped_early = True
+                            print(f"[sync] {known_streak} consecutive page(s) of known listings{f' from {source}' if source else ''}; stopping early.")
+                            if not self.scraper.stop_source(source):
+                                break
+            except Exception as e:
+                # Pages already read still go through the pipeline; only a complete walk counts as a full sweep
+                stopped_early = True
+                print(f"[sync] Crawl stopped after an error: {e}; continuing with the {seen_total} listing(s) found so far.")
+            # Only reached when the crawl ends on its own; a cancelled stage has no reader left for the marker
+            await enrich_q.put(_DONE)
+            print(f"[sync] Found {seen_total} IT listings; {counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged."
+                  + (f" Rechecking {len(revalidating)} detail page(s) for description changes." if revalidating else ""))
+
+        async def enrich_batch(batch: List[Listing]) -> None:
+            fetch = [l for l in batch if l.id not in resumed]
+            enriched: List[Listing] = []
+            for l in (await self.scraper.enrich_descriptions(fetch) if fetch else []):
+                if l.id in revalidating:
+                    if l.detail_error is not None:
+                        # Already stored as it was; the next full sweep checks it again
+                        continue
+                    l = with_detail_changes(l, stored_fps.get(l.id))
+                    if "description" not in l.changes:
+                        continue
+                    counts["unchanged"] -= 1
+                    counts["changed"] += 1
+                    enriched.append(l)
+                    continue
+                if l.detail_error is not None:
+                    # Left out of state, so the next run sees it as new or changed again and retries
+                    counts["enrich_failed"] += 1
+                    continue
+                enriched.append(with_detail_changes(l, stored_fps.get(l.id)))
+            if self.journal is not None:
+                self.journal.record("enriched", enriched)
+            for l in enriched + [l for l in batch if l.id in resumed]:
+                processed[l.id] = l
+                await classify_q.put(l)
+
+        async def enrich_in_lane(batch: List[Listing], lane: asyncio.Semaphore, slot: asyncio.Semaphore) -> None:
+            try:
+                async with lane:
+                    await enrich_batch(batch)
+            finally:
+                slot.release()
+
+        async def enrich() -> None:
+            # Batches are split by source and each source enriches them in its own lane, so a burst of pages from
+            # one source does not leave the others idle. The semaphore bounds batches waiting or running across lanes.
+            sources = self.scraper.source_count()
+            batch_size, lane_width, slots = _enrich_lanes(sources)
+            slot = asyncio.Semaphore(slots)
+            lanes: Dict[str, asyncio.Semaphore] = {}
+            async with asyncio.TaskGroup() as batches:
+                done = False
+                while not done:
+                    batch, done = await self._drain_batch(enrich_q, batch_size * sources)
+                    by_source: Dict[str, List[Listing]] = {}
+                    for l in batch:
+                        by_source.setdefault(self.scraper.source_of(l), []).append(l)
+                    for source, group in by_source.items():
+                        await slot.acquire()
+                        batches.create_task(enrich_in_lane(group, lanes.setdefault(source, asyncio.Semaphore(lane_width)), slot))
+            await classify_q.put(_DONE)
+            if counts["enrich_failed"]:
+                print(f"[sync] Enrichment complete; {counts['enrich_failed']} detail page(s) failed and will be retried next run.")
+            else:
+                print("[sync] Enrichment complete.")
+
+        async def classify_batch(batch: List[Listing], slot: asyncio.Semaphore) -> None:
+            try:
+                verdicts: Dict[str, Optional[bool]] = {}
+                to_classify: List[Listing] = []
+                for l in batch:
+                    stored = stored_fps.get(l.id)
+                    entry = resumed.get(l.id)
+                    if entry is not None and entry.stage == "classified" and entry.verdict is not None:
+                        verdicts[l.id] = entry.verdict
+                    elif stored is not None and stored.relevant is not None and not _RECLASSIFY_ON.intersection(l.changes):
+                        # Status/agency-only updates keep the earlier verdict
+                        verdicts[l.id] = stored.relevant
+                    elif stored is None and (original := self._near_duplicate(l)) is not None:
+                        # A repost under a new id inherits the verdict and is posted as an amendment
+                        verdicts[l.id] = original.relevant
+                        processed[l.id] = replace(l, relevant=original.relevant, relevance_source="near_duplicate", amends=original.id)
+                        counts["amendments"] += 1
+                    else:
+                        to_classify.append(l)
+                if to_classify and self.classifier is not None:
+                    try:
+                        with metrics.span("classify_batch"):
+                            fresh = await self.classifier.classify_many(to_classify)
+                    except Exception as e:
+                        print(f"[sync] Classifier error for {len(to_classify)} listing(s): {e}")
+                        fresh = {}
+                    # Adapters report a failed request as a missing verdict. Those listings are left out of state
+                    # like failed detail pages, so the next run sees them as new or changed and classifies them again.
+                    failed = {l.id for l in to_classify if fresh.get(l.id) is None}
+                    if failed:
+                        print(f"[sync] No verdict for {len(failed)} listing(s); they will be retried next run.")
+                        counts["classify_failed"] += len(failed)
+                        for lid in failed:
+                            processed.pop(lid, None)
+                        batch = [l for l in batch if l.id not in failed]
+                    for l in to_classify:
+                        verdict = fresh.get(l.id)
+                        if verdict is None:
+                            continue
+                        verdicts[l.id] = verdict
+                        # Stored decisions train the pre-filter and feed its offline evaluation
+                        processed[l.id] = replace(l, relevant=verdict, relevance_source=self.classifier.label_source(l.id))
+                if self.journal is not None:
+                    self.journal.record("classified", [processed[l.id] for l in batch], verdicts)
+                # Not relevant means done: nothing to send, so it can be saved now
+                persist([processed[l.id] for l in batch if verdicts.get(l.id) is False])
+                for l in batch:
+                    # Without a classifier every listing is sent
+                    if verdicts.get(l.id) is False:
+                        continue
+                    counts["relevant"] += 1
+                    await notify_q.put(processed[l.id])
+            finally:
+                slot.release()
+
+        async def classify() -> None:
+            # Batches are classified concurrently; the semaphore bounds how many are in flight
+            slot = asyncio.Semaphore(max(1, settings.classify_concurrency))
+            async with asyncio.TaskGroup() as batches:
+                done = False
+                while not done:
+                    batch, done = await self._drain_batch(classify_q, max(1, settings.classify_batch_size))
+                    if not batch:
+                        continue
+                    await slot.acquire()
+                    batches.create_task(classify_batch(batch, slot))
+            await notify_q.put(_DONE)
+            if counts["amendments"]:
+                print(f"[sync] {counts['amendments']} new listing(s) are reposts or amendments of earlier ones; reused their verdicts.")
+            if self.classifier is not None:
+                print(f"[sync] {counts['relevant']}/{counts['new'] + counts['changed']} new or changed listings deemed relevant.")
+
+        async def notify() -> None:
+            done = False
+            while not done:
+                batch, done = await self._drain_batch(notify_q, size)
+                if not batch:
+                    continue
+                print(f"[sync] Sending {len(batch)} relevant listing(s) to notifier ({time.monotonic() - started:.1f}s into run)…")
+                if self.journal is not None:
+                    # Intent first: a crash mid-send leaves these marked, and the next run will not post them again
+                    self.journal.record("sending", batch)
+                try:
+                    with metrics.span("notify_batch"):
+                        await self.notifier.send_listings(batch)
+                except PartialDeliveryError as e:
+                    if self.journal is not None:
+                        # Confirmed messages are done; ones that may have posted stay at "sending" so they are
+                        # never posted twice, and only the listings known to be unsent go back to classified
+                        self.journal.record("notified", [l for l in batch if l.id in e.delivered])
+                        self.journal.record("classified", [l for l in batch if l.id not in e.delivered and l.id not in e.uncertain])
+                    counts["sent"] += len(e.delivered)
+                    raise
+                except Exception:
+                    if self.journal is not None:
+                        # The notifier posted nothing (see NotifierPort), so the next run posts the batch again
+                        self.journal.record("classified", batch)
+                    raise
+                if self.journal is not None:
+                    self.journal.record("notified", batch)
+                counts["sent"] += len(batch)
+                # Recorded only once they made it through notification
+                persist(batch)
+
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(self._timed_stage("crawl", crawl_and_dedupe()))
+            tg.create_task(self._timed_stage("enrich", enrich()))
+            tg.create_task(self._timed_stage("classify", classify()))
+            tg.create_task(self._timed_stage("notify", notify()))
+        if not stopped_early:
+            self.state_repo.set_meta(LAST_FULL_SWEEP_KEY, str(time.time()))
+        print(f"[sync] Pipeline finished in {time.monotonic() - started:.1f}s; sent {counts['sent']} listing(s).")
+        self.scraper.report_stats()
+        if self.classifier is not None:
+            self.classifier.report_stats()
+
+        persist([], flush=True)
+        if self.journal is not None:
+            self.journal.clear()
+        print(f"[sync] Saved {len(saved_ids)} new/changed listing(s) to state.")
+        if self.archive is not None:
+            self._archive_run(saved_ids, seen_ids if not stopped_early else None, full_sweep, started_at)
+        return SyncResult(**counts, full_sweep=full_sweep, stopped_early=stopped_early, duration_s=time.monotonic() - started)
@@ -0,0 +1,44 @@
+from dataclasses import dataclass, replace
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+from .fingerprint import Fingerprint, changed_row_fields, detail_fingerprint, row_fingerprint
+from .models import Listing
+
+
+class ChangeKind(str, Enum):
+    NEW = "new"
+    CHANGED = "changed"
+    UNCHANGED = "unchanged"
+
+
+@dataclass(frozen=True)
+class ListingDiff:
+    kind: ChangeKind
+    listing: Listing  # carries the current row_hash, and `changes` when kind is CHANGED
+    stored: Optional[Fingerprint] = None
+
+
+def diff_rows(current: Iterable[Listing], stored: Dict[str, Fingerprint]) -> List[ListingDiff]:
+    """Classify crawled grid rows against stored fingerprints without touching detail pages."""
+    out: List[ListingDiff] = []
+    for l in current:
+        row_hash = row_fingerprint(l)
+        fp = stored.get(l.id)
+        if fp is None:
+            out.append(ListingDiff(ChangeKind.NEW, replace(l, row_hash=row_hash)))
+            continue
+        fields = changed_row_fields(fp.row, row_hash) if fp.row != row_hash else ()
+        if fields:
+            out.append(ListingDiff(ChangeKind.CHANGED, replace(l, row_hash=row_hash, changes=fields), fp))
+        else:
+            out.append(ListingDiff(ChangeKind.UNCHANGED, replace(l, row_hash=row_hash), fp))
+    return out
+
+
+def with_detail_changes(enriched: Listing, stored: Optional[Fingerprint]) -> Listing:
+    """Stamp detail_hash on an enriched listing and flag 'description' if the detail text changed."""
+    detail_hash = detail_fingerprint(enriched.description)
+    changes: Tuple[str, ...] = enriched.changes
+    if stored is not None and detail_hash is not None and stored.detail is not None and detail_hash != stored.detail:
+        changes = changes + ("description",)
+    return replace(enriched, detail_hash=detail_hash, changes=changes)
@@ -0,0 +1,49 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from .models import Listing
+
+# Grid-row fields tracked for changes, in fingerprint order
+ROW_FIELDS: Tuple[str, ...] = ("title", "agency", "category", "status", "detail_url")
+_SEGMENT_BYTES = 4
+
+
+def _digest(text: str, size: int) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=size).hexdigest()
+
+
+def row_fingerprint(listing: Listing) -> str:
+    """One short hash per row field joined by ':'; equal strings mean an unchanged row."""
+    return ":".join(_digest(" ".join(str(getattr(listing, name)).split()), _SEGMENT_BYTES) for name in ROW_FIELDS)
+
+
+def detail_fingerprint(description: Optional[str]) -> Optional[str]:
+    if description is None:
+        return None
+    return _digest(" ".join(description.split()), 8)
+
+
+def changed_row_fields(old_row_hash: str, new_row_hash: str) -> Tuple[str, ...]:
+    old, new = old_row_hash.split(":"), new_row_hash.split(":")
+    if len(old) != len(new):
+        # Fingerprint layout changed; treat every field as changed
+        return ROW_FIELDS
+    return tuple(name for name, a, b in zip(ROW_FIELDS, old, new) if a != b)
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    row: str
+    detail: Optional[str]
+    relevant: Optional[bool] = None
+    # False when the row predates stored fingerprints and they were derived from stored fields
+    persisted: bool = True
+
+
+def fingerprint_of(stored: Listing) -> Fingerprint:
+    return Fingerprint(
+        row=stored.row_hash or row_fingerprint(stored),
+        detail=stored.detail_hash or detail_fingerprint(stored.description),
+        relevant=stored.relevant,
+        persisted=stored.row_hash is not None and (stored.detail_hash is not None or stored.description is None),
+    )
@@ -1,8 +1,9 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, Optional, Tuple
 
 
-@dataclass(frozen=True)
+# slots keep large snapshots and archive loads compact: no per-instance __dict__
+@dataclass(frozen=True, slots=True)
 class Listing:
     id: str
     title: str
@@ -11,3 +12,46 @@ class Listing:
     status: str
     detail_url: str
     description: Optional[str] = None
+    # Structured fields from the detail page, when present
+    solicitation_number: Optional[str] = None
+    due_date: Optional[str] = None
+    contact: Optional[str] = None
+    estimated_value: Optional[str] = None
+    relevant: Optional[bool] = None
+    relevance_source: Optional[str] = None  # "llm", "prefilter" or "near_duplicate"
+    amends: Optional[str] = None  # id of the earlier listing this one reposts or amends
+    row_hash: Optional[str] = None  # per-field fingerprint of the results-grid row
+    detail_hash: Optional[str] = None  # fingerprint of the extracted detail-page text
+    # Set during a sync for tracked listings whose fields changed; never persisted
+    changes: Tuple[str, ...] = field(default=(), compare=False, metadata={"transient": True})
+    # Set during a sync when the detail page could not be fetched or parsed; never persisted
+    detail_error: Optional[str] = field(default=None, compare=False, metadata={"transient": True})
+
+
+@dataclass(frozen=True)
+class ProgressEntry:
+    """Where a listing got to in an unfinished sync, as recorded in the progress journal."""
+
+    stage: str  # "enriched", "classified", "sending" or "notified"
+    listing: Listing
+    verdict: Optional[bool] = None  # set from the "classified" stage on; None fails open
+
+
+def persisted_fields() -> Tuple[str, ...]:
+    return tuple(f.name for f in fields(Listing) if not f.metadata.get("transient"))
+
+
+def to_record(listing: Listing) -> Dict[str, Any]:
+    return {name: getattr(listing, name) for name in persisted_fields()}
+
+
+def merge_listing(stored: Optional[Listing], incoming: Listing) -> Listing:
+    """Overlay incoming on stored; optional fields left as None on incoming keep the stored value."""
+    if stored is None:
+        return incoming
+    kept = {
+        f.name: getattr(stored, f.name)
+        for f in fields(Listing)
+        if f.default is None and getattr(incoming, f.name) is None
+    }
+    return replace(incoming, **kept) if kept else incoming
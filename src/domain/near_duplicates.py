@@ -0,0 +1,149 @@
+import hashlib
+import re
+from array import array
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
+from .models import Listing
+
+# 128 slots in 32 bands of 4 rows: pairs at Jaccard 0.8 share a band with probability > 0.9999, while pairs
+# below ~0.3 rarely do. Candidates are then checked against the full signature.
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+# Below this many distinct shingles (after boilerplate removal) a listing is too short to match reliably and
+# goes to the classifier instead
+MIN_SHINGLES = 25
+# Bump when shingling changes so stored signatures are rebuilt
+SIGNATURE_VERSION = 2
+
+# Procedural sentences the portal and agencies paste into many unrelated solicitations. Shared boilerplate
+# would otherwise make unrelated listings look like reposts of each other.
+BOILERPLATE = (
+    r"\bplease (see|refer to|review|download) (the )?(attach|solicitation document|bid document)",
+    r"\b(all|any) (questions|inquiries) (must|should|shall) be (submitted|directed|sent)",
+    r"\bsupplier portal\b|\bpasupplierportal\b|\bjaggaer\b|\bemarketplace\b",
+    r"\bregister(ed)? (as a (supplier|vendor)|with the commonwealth|in the commonwealth)",
+    r"\b(small diverse business|small business participation|veteran business enterprise|sdb|vbe|sb)\b.*\b(participation|commitment|goal|requirement)",
+    r"\bterms and conditions\b",
+    r"\bcommonwealth (reserves the right|is not (responsible|liable|obligated))",
+    r"\b(no|late) (bids|responses|quotes|proposals) will (not )?be accepted",
+    r"\bfor (more|additional|further) information,? (contact|see|please|refer)",
+    r"\b(this|the) (solicitation|bid|procurement|rfq|rfp|ifb|invitation) (is|has been|was|will be) (posted|issued|advertised|published)",
+    r"\bbidders? (must|shall|are required to) (submit|register|acknowledge)",
+)
+_BOILERPLATE = re.compile("|".join(f"(?:{p})" for p in BOILERPLATE), re.I)
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+_BIN_BITS = NUM_PERM.bit_length() - 1
+_MASK = 0xFFFFFFFF
+_EMPTY = _MASK + 1
+# Offset added per step when an empty bin borrows from a neighbour, so borrowed values never equal real ones
+_BORROW_STEP = 0x9E3779B1
+
+_MASK64 = (1 << 64) - 1
+# Odd 64-bit multipliers for combining word hashes into a shingle hash
+_MIX = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+Signature = Tuple[int, ...]
+
+
+@lru_cache(maxsize=65536)
+def _word_hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _mix(x: int) -> int:
+    # splitmix64 finaliser, so every bit of the combined hash depends on all three words
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def shingles(text: str) -> Set[int]:
+    """64-bit hashes of overlapping word 3-grams of the lower-cased text."""
+    words = [_word_hash(w) for w in _WORD.findall(text.lower())]
+    if len(words) < SHINGLE_WORDS:
+        words = words + [0] * (SHINGLE_WORDS - len(words))
+    a, b, c = _MIX
+    return {_mix((a * x + b * y + c * z) & _MASK64) for x, y, z in zip(words, words[1:], words[2:])}
+
+
+def strip_boilerplate(text: str) -> str:
+    """The text without sentences that match the portal's standard procedural language."""
+    return "\n".join(s for s in _SENTENCE.split(text) if s.strip() and not _BOILERPLATE.search(s))
+
+
+def minhash(text: str) -> Signature:
+    return minhash_of(shingles(text))
+
+
+def minhash_of(grams: Set[int]) -> Signature:
+    """One-permutation MinHash: each shingle hash lands in one of NUM_PERM bins, which keep their minimum.
+
+    This costs one pass over the shingles instead of one per permutation. Empty bins borrow from the next
+    non-empty bin to the right (rotation densification), so similar texts still agree slot by slot.
+    """
+    bins = [_EMPTY] * NUM_PERM
+    for h in grams:
+        slot = h & (NUM_PERM - 1)
+        value = (h >> _BIN_BITS) & _MASK
+        if value < bins[slot]:
+            bins[slot] = value
+    if _EMPTY in bins:
+        dense = list(bins)
+        # Walk right to left twice around the ring, remembering the nearest filled bin to the right
+        nearest = None
+        for i in range(2 * NUM_PERM - 1, -1, -1):
+            slot = i % NUM_PERM
+            if bins[slot] != _EMPTY:
+                nearest = i
+            elif nearest is not None and i < NUM_PERM:
+                step = nearest - i
+                dense[slot] = (bins[nearest % NUM_PERM] + step * _BORROW_STEP) & _MASK
+        bins = dense
+    return tuple(bins)
+
+
+def listing_signature(listing: Listing) -> Optional[Signature]:
+    """Signature over title and description without boilerplate.
+
+    None until the listing has been enriched, and for text too short to compare reliably.
+    """
+    if not listing.description:
+        return None
+    grams = shingles(strip_boilerplate(f"{listing.title}\n{listing.description}"))
+    if len(grams) < MIN_SHINGLES:
+        return None
+    return minhash_of(grams)
+
+
+def same_agency(a: Optional[str], b: Optional[str]) -> bool:
+    """Reposts come from the issuing agency; the same text from another agency is a different solicitation."""
+    return " ".join((a or "").split()).casefold() == " ".join((b or "").split()).casefold()
+
+
+def band_keys(signature: Signature) -> List[int]:
+    """One bucket key per band, as signed 64-bit ints so SQLite can index them."""
+    keys = []
+    for band in range(BANDS):
+        rows = array("I", signature[band * ROWS:(band + 1) * ROWS]).tobytes()
+        keys.append(int.from_bytes(hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest(), "little", signed=True))
+    return keys
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def pack_signature(signature: Signature) -> bytes:
+    return array("I", signature).tobytes()
+
+
+def unpack_signature(blob: bytes) -> Signature:
+    values = array("I")
+    values.frombytes(blob)
+    return tuple(values)
@@ -1,23 +1,61 @@
 from abc import ABC, abstractmethod
-from typing import List
-from .models import Listing
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from .fingerprint import Fingerprint, fingerprint_of
+from .models import Listing, ProgressEntry, merge_listing
+from .near_duplicates import Signature, listing_signature, same_agency, similarity
 
 
 class ListingsScraperPort(ABC):
     @abstractmethod
-    def fetch_it_listings(self) -> List[Listing]:
+    def iter_listing_pages(self, full_sweep: bool = False) -> AsyncIterator[List[Listing]]:
         ...
 
     @abstractmethod
-    def enrich_description(self, listing: Listing) -> Listing:
+    async def enrich_descriptions(self, listings: List[Listing]) -> List[Listing]:
         ...
 
+    def report_stats(self) -> None:
+        return None
+
+    def source_count(self) -> int:
+        """Sources that fetch details in parallel; enrichment batches are sized to keep each one busy."""
+        return 1
+
+    def source_of(self, listing: Listing) -> str:
+        """Name of the source a crawled listing came from, when the scraper combines several."""
+        return ""
+
+    def stop_source(self, source: str) -> bool:
+        """Stop crawling one source while the others continue; False means stop the whole crawl instead."""
+        return False
+
+    async def aclose(self) -> None:
+        return None
+
+
+class PartialDeliveryError(RuntimeError):
+    """A send that failed after some messages may have gone out.
+
+    `delivered` holds the ids of listings whose message was confirmed, `uncertain` those whose message failed
+    in a way that may still have posted it (a 5xx or a dropped connection). Every other listing was not posted.
+    """
+
+    def __init__(self, message: str, delivered: Iterable[str] = (), uncertain: Iterable[str] = ()) -> None:
+        super().__init__(message)
+        self.delivered: Set[str] = set(delivered)
+        self.uncertain: Set[str] = set(uncertain)
+
 
 class NotifierPort(ABC):
     @abstractmethod
     async def send_listings(self, listings: List[Listing]) -> None:
+        """Post the listings. Raises PartialDeliveryError once anything may have been posted; any other
+        exception means none of them were."""
         ...
 
+    async def close(self) -> None:
+        return None
+
 
 class StateRepositoryPort(ABC):
     @abstractmethod
@@ -28,8 +66,136 @@ class StateRepositoryPort(ABC):
     def save_snapshot(self, listings: List[Listing]) -> None:
         ...
 
+    # Incremental operations. The defaults go through the full snapshot; indexed backends override them.
+    def known_ids(self, ids: Iterable[str]) -> Set[str]:
+        wanted = set(ids)
+        return {l.id for l in self.load_last_snapshot() if l.id in wanted}
+
+    def known_urls(self, urls: Iterable[str]) -> Set[str]:
+        wanted = set(urls)
+        return {l.detail_url for l in self.load_last_snapshot() if l.detail_url in wanted}
+
+    def get_listings(self, ids: Iterable[str]) -> Dict[str, Listing]:
+        wanted = set(ids)
+        return {l.id: l for l in self.load_last_snapshot() if l.id in wanted}
+
+    def get_fingerprints(self, ids: Iterable[str]) -> Dict[str, Fingerprint]:
+        return {i: fingerprint_of(l) for i, l in self.get_listings(ids).items()}
+
+    def upsert_listings(self, listings: List[Listing]) -> None:
+        """Insert or update listings; a None optional field keeps the stored value."""
+        if not listings:
+            return
+        by_id = {l.id: l for l in self.load_last_snapshot()}
+        for l in listings:
+            by_id[l.id] = merge_listing(by_id.get(l.id), l)
+        self.save_snapshot(list(by_id.values()))
+
+    def labelled_listings(self, source: Optional[str] = None) -> List[Listing]:
+        """Listings with a stored relevance decision, optionally only those made by the given source."""
+        return [
+            l for l in self.load_last_snapshot()
+            if l.relevant is not None and (source is None or l.relevance_source == source)
+        ]
+
+    def label_version(self, source: Optional[str] = None) -> str:
+        """A token that changes whenever the stored decisions (optionally of one source) do; cheap to compare between syncs."""
+        labels = self.labelled_listings(source)
+        return f"{len(labels)}:{hash(tuple(sorted((l.id, l.relevant) for l in labels)))}"
+
+    def reset(self) -> None:
+        self.save_snapshot([])
+
+    # Near-duplicate lookup. The default computes signatures over the full snapshot; indexed backends keep LSH buckets.
+    def find_near_duplicate(self, signature: Signature, threshold: float, exclude: Iterable[str] = (),
+                            agency: Optional[str] = None) -> Optional[Tuple[Listing, float]]:
+        """The most similar stored listing at or above threshold, with its estimated similarity.
+
+        With an agency, only listings from that agency are considered.
+        """
+        excluded = set(exclude)
+        best: Optional[Tuple[Listing, float]] = None
+        for l in self.load_last_snapshot():
+            if agency is not None and not same_agency(agency, l.agency):
+                continue
+            other = listing_signature(l) if l.id not in excluded else None
+            if other is None:
+                continue
+            score = similarity(signature, other)
+            if score >= threshold and (best is None or score > best[1]):
+                best = (l, score)
+        return best
+
+    def index_signatures(self, listings: List[Listing]) -> None:
+        return None
+
+    # Small key/value store for run bookkeeping (e.g. when the last full crawl happened); it must outlive the process
+    @abstractmethod
+    def get_meta(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set_meta(self, key: str, value: str) -> None:
+        ...
+
+    def close(self) -> None:
+        return None
+
 
 class ClassifierPort(ABC):
     @abstractmethod
-    async def is_relevant(self, listing: Listing) -> bool:
+    async def classify(self, listing: Listing) -> Optional[bool]:
+        """True/False for relevant or not, None when no definitive answer was obtained (e.g. an API error)."""
+        ...
+
+    async def classify_many(self, listings: List[Listing]) -> Dict[str, Optional[bool]]:
+        """Verdicts keyed by listing id; classifiers that can batch requests override this."""
+        return {l.id: await self.classify(l) for l in listings}
+
+    def label_source(self, listing_id: str) -> str:
+        """Which stage produced the latest verdict for listing_id."""
+        return "llm"
+
+    def report_stats(self) -> None:
+        return None
+
+    async def aclose(self) -> None:
+        return None
+
+
+class SyncJournalPort(ABC):
+    """Write-ahead record of per-listing pipeline progress, so an interrupted sync can resume."""
+
+    @abstractmethod
+    def record(self, stage: str, listings: List[Listing], verdicts: Optional[Dict[str, Optional[bool]]] = None) -> None:
+        """Durably move listings to stage in one commit; verdicts are kept from the 'classified' stage on."""
+        ...
+
+    @abstractmethod
+    def load(self) -> Dict[str, ProgressEntry]:
         ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def close(self) -> None:
+        return None
+
+
+class SnapshotArchivePort(ABC):
+    """Append-only history of listing state across sync runs."""
+
+    @abstractmethod
+    def append_run(self, listings: Iterable[Listing], seen_ids: Optional[Set[str]] = None, full_sweep: bool = False,
+                   started_at: Optional[float] = None) -> int:
+        """Record one run: the listings it processed (read once, in order), and when seen_ids is given (a crawl that reached every
+        page), removals of archived listings that are no longer on the portal. Returns the run id."""
+        ...
+
+    @abstractmethod
+    def is_empty(self) -> bool:
+        ...
+
+    def close(self) -> None:
+        return None
@@ -8,8 +8,48 @@ load_dotenv()
 @dataclass(frozen=True)
 class Settings:
     base_url: str = os.getenv("BASE_URL", "https://www.emarketplace.state.pa.us/Procurement.aspx")
+    sources: str = os.getenv("SOURCES", "")
+    max_concurrent_requests: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", "16"))
     check_interval_minutes: int = int(os.getenv("CHECK_INTERVAL_MINUTES", "60"))
+    min_interval_minutes: int = int(os.getenv("MIN_INTERVAL_MINUTES", "15"))
+    max_interval_minutes: int = int(os.getenv("MAX_INTERVAL_MINUTES", "240"))
+    business_hours: str = os.getenv("BUSINESS_HOURS", "7-18")
     reset_state_on_start: bool = os.getenv("RESET_STATE_ON_START", "false").lower() in {"1", "true", "yes"}
+    enrich_concurrency: int = int(os.getenv("ENRICH_CONCURRENCY", "8"))
+    enrich_per_host_concurrency: int = int(os.getenv("ENRICH_PER_HOST_CONCURRENCY", "4"))
+    enrich_per_host_interval_ms: int = int(os.getenv("ENRICH_PER_HOST_INTERVAL_MS", "0"))
+    request_timeout_seconds: float = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+    request_retries: int = int(os.getenv("REQUEST_RETRIES", "4"))
+    detail_max_failures: int = int(os.getenv("DETAIL_MAX_FAILURES", "3"))
+    circuit_breaker_failures: int = int(os.getenv("CIRCUIT_BREAKER_FAILURES", "8"))
+    circuit_breaker_cooldown_seconds: float = float(os.getenv("CIRCUIT_BREAKER_COOLDOWN_SECONDS", "30"))
+    state_backend: str = os.getenv("STATE_BACKEND", "sqlite").lower()
+    classifier_cache: bool = os.getenv("CLASSIFIER_CACHE", "true").lower() in {"1", "true", "yes"}
+    classifier_cache_ttl_days: float = float(os.getenv("CLASSIFIER_CACHE_TTL_DAYS", "90"))
+    classifier_cache_max_entries: int = int(os.getenv("CLASSIFIER_CACHE_MAX_ENTRIES", "50000"))
+    classify_batch_size: int = int(os.getenv("CLASSIFY_BATCH_SIZE", "10"))
+    classify_concurrency: int = int(os.getenv("CLASSIFY_CONCURRENCY", "3"))
+    prefilter: bool = os.getenv("PREFILTER", "true").lower() in {"1", "true", "yes"}
+    prefilter_yes_threshold: float = float(os.getenv("PREFILTER_YES_THRESHOLD", "0.97"))
+    prefilter_no_threshold: float = float(os.getenv("PREFILTER_NO_THRESHOLD", "0.03"))
+    prefilter_min_training: int = int(os.getenv("PREFILTER_MIN_TRAINING", "50"))
+    notify_mode: str = os.getenv("NOTIFY_MODE", "pack").lower()
+    notify_full_descriptions: str = os.getenv("NOTIFY_FULL_DESCRIPTIONS", "attachment").lower()
+    notify_description_chars: int = int(os.getenv("NOTIFY_DESCRIPTION_CHARS", "300"))
+    incremental_stop_after_pages: int = int(os.getenv("INCREMENTAL_STOP_AFTER_PAGES", "1"))
+    full_sweep_interval_hours: float = float(os.getenv("FULL_SWEEP_INTERVAL_HOURS", "24"))
+    revalidate_details: bool = os.getenv("REVALIDATE_DETAILS", "true").lower() in {"1", "true", "yes"}
+    http_cache: bool = os.getenv("HTTP_CACHE", "true").lower() in {"1", "true", "yes"}
+    http_cache_max_mb: int = int(os.getenv("HTTP_CACHE_MAX_MB", "200"))
+    crawl_sessions: int = int(os.getenv("CRAWL_SESSIONS", "3"))
+    metrics: bool = os.getenv("METRICS", "false").lower() in {"1", "true", "yes"}
+    metrics_host: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    metrics_port: int = int(os.getenv("METRICS_PORT", "9108"))
+    near_duplicates: bool = os.getenv("NEAR_DUPLICATES", "true").lower() in {"1", "true", "yes"}
+    near_duplicate_threshold: float = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+    sync_journal: bool = os.getenv("SYNC_JOURNAL", "true").lower() in {"1", "true", "yes"}
+    archive: bool = os.getenv("ARCHIVE", "true").lower() in {"1", "true", "yes"}
+    pipeline_queue_size: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "50"))
 
 
 settings = Settings()
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Optional, Tuple
+from .config import settings
+
+PREFIX = "emarketplace"
+# Histogram buckets for span durations, in seconds
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, Any]) -> _LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: _LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+class _Span:
+    __slots__ = ("_metrics", "_name", "_labels", "_started")
+
+    def __init__(self, metrics: "Metrics", name: str, labels: Dict[str, Any]) -> None:
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+        self._started = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._metrics.observe(self._name, time.perf_counter() - self._started, **self._labels)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+class Metrics:
+    """In-process counters and span timings, rendered in Prometheus text format.
+
+    Spans are named timers (`with metrics.span("postback"):`) recorded into one histogram family labelled by
+    span name. Between start_run() and finish_run() the same observations also build the per-stage breakdown
+    of the current sync, which is kept as last_run.
+    """
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, Dict[_LabelKey, float]] = {}
+        self._spans: Dict[Tuple[str, _LabelKey], _Histogram] = {}
+        self._run_spans: Dict[str, Dict[str, float]] = {}
+        self._run_counters: Dict[str, float] = {}
+        self._run_started: Optional[float] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        series = self._counters.setdefault(name, {})
+        key = _key(labels)
+        series[key] = series.get(key, 0) + value
+        if self._run_started is not None:
+            self._run_counters[name] = self._run_counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        key = (name, _key(labels))
+        hist = self._spans.get(key)
+        if hist is None:
+            hist = self._spans[key] = _Histogram()
+        hist.add(seconds)
+        if self._run_started is not None:
+            label = name if not labels else f"{name}[{','.join(str(v) for _, v in key[1])}]"
+            stage = self._run_spans.setdefault(label, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            stage["count"] += 1
+            stage["total_s"] += seconds
+            stage["max_s"] = max(stage["max_s"], seconds)
+
+    def span(self, name: str, **labels: Any) -> _Span:
+        return _Span(self, name, labels)
+
+    def start_run(self) -> None:
+        self._run_started = time.time()
+        self._run_spans = {}
+        self._run_counters = {}
+
+    def finish_run(self, summary: Optional[Dict[str, Any]] = None) -> None:
+        if self._run_started is None:
+            return
+        finished = time.time()
+        self.last_run = {
+            "started_at": self._run_started,
+            "finished_at": finished,
+            "duration_s": finished - self._run_started,
+            "summary": summary or {},
+            "stages": dict(sorted(self._run_spans.items(), key=lambda kv: -kv[1]["total_s"])),
+            "counters": dict(sorted(self._run_counters.items())),
+        }
+        self._run_started = None
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name, series in sorted(self._counters.items()):
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{metric}{_format_labels(key)} {value:g}")
+        if self._spans:
+            metric = f"{PREFIX}_span_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (name, key), hist in sorted(self._spans.items()):
+                labels = (("span", name),) + key
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), hist.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{metric}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {hist.sum:.6f}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {hist.count}")
+        if self.last_run is not None:
+            lines.append(f"# TYPE {PREFIX}_last_run_duration_seconds gauge")
+            lines.append(f"{PREFIX}_last_run_duration_seconds {self.last_run['duration_s']:.3f}")
+            lines.append(f"# TYPE {PREFIX}_last_run_finished_timestamp_seconds gauge")
+            lines.append(f"{PREFIX}_last_run_finished_timestamp_seconds {self.last_run['finished_at']:.0f}")
+        return "\n".join(lines) + "\n"
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class NoopMetrics:
+    """Stand-in used when metrics are disabled; every call is a constant-time no-op."""
+
+    enabled = False
+    last_run: Optional[Dict[str, Any]] = None
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        return None
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        return None
+
+    def span(self, name: str, **labels: Any) -> _NoopSpan:
+        return _NOOP_SPAN
+
+    def start_run(self) -> None:
+        return None
+
+    def finish_run(self, summary: Optional[Dict[str, Any]] = None) -> None:
+        return None
+
+    def render_prometheus(self) -> str:
+        return ""
+
+
+metrics = Metrics() if settings.metrics else NoopMetrics()
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = (await asyncio.wait_for(reader.readline(), timeout=5)).decode("latin-1")
+        # Drain headers; the endpoint ignores them
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.split()
+        path = parts[1].split("?", 1)[0] if len(parts) > 1 else "/"
+        if path == "/metrics":
+            status, ctype, body = "200 OK", "text/plain; version=0.0.4", metrics.render_prometheus()
+        elif path == "/last-run":
+            status, ctype, body = "200 OK", "application/json", json.dumps(metrics.last_run, indent=2)
+        else:
+            status, ctype, body = "404 Not Found", "text/plain", "not found: try /metrics or /last-run\n"
+        data = body.encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+            + data
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(host: str, port: int) -> asyncio.AbstractServer:
+    """Serve /metrics (Prometheus text) and /last-run (JSON stage breakdown) on the running event loop."""
+    server = await asyncio.start_server(_handle, host, port)
+    print(f"[metrics] Serving http://{host}:{port}/metrics and /last-run")
+    return server
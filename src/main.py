@@ -1,46 +1,155 @@
 import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, List, Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from src.adapters.scraper.emarketplace_scraper import EMarketplaceScraper
+from src.adapters.scraper.emarketplace_scraper import GRID_ID, EMarketplaceScraper
+from src.adapters.scraper.http_cache import HttpCache
+from src.adapters.scraper.source_registry import Source, SourceRegistry, parse_sources
 from src.adapters.notifier.discord_notifier import DiscordNotifier
-from src.adapters.state.json_state_repo import JsonStateRepository
-from src.adapters.classifier.openai_classifier import OpenAIClassifier
+from src.adapters.state.json_state_repo import JsonStateRepository, STATE_PATH
+from src.adapters.state.sqlite_state_repo import SqliteStateRepository, migrate_json_state
+from src.adapters.state.snapshot_archive import SqliteSnapshotArchive
+from src.adapters.state.sync_journal import SqliteSyncJournal
+from src.adapters.classifier.openai_classifier import OpenAIClassifier, PROMPT_VERSION
+from src.adapters.classifier.classification_cache import CachedClassifier, ClassificationCache
+from src.adapters.classifier.prefilter import Prefilter, PrefilterClassifier
+from src.application.scheduling import AdaptiveInterval, SyncRunner, parse_business_hours
 from src.application.service import SyncService
 from src.infrastructure.config import settings
-import os
+from src.infrastructure.metrics import metrics, serve_metrics
+from src.domain.ports import ClassifierPort, ListingsScraperPort, NotifierPort, StateRepositoryPort
 
 
-async def run_once():
-    scraper = EMarketplaceScraper()
-    notifier = DiscordNotifier()
-    state_repo = JsonStateRepository()
-    classifier = None
-    try:
-        classifier = OpenAIClassifier()
-        print("[main] OpenAI classifier initialized.")
-    except Exception as e:
-        print(f"[main] OpenAI classifier not available: {e}")
-    if settings.reset_state_on_start:
+def build_scraper(http_cache: Optional[HttpCache]) -> ListingsScraperPort:
+    """The BASE_URL scraper, combined with any SOURCES under one request budget."""
+    budget = asyncio.Semaphore(max(1, settings.max_concurrent_requests))
+    primary = EMarketplaceScraper(http_cache=http_cache, budget=budget)
+    extra = parse_sources(settings.sources)
+    if not extra:
+        return primary
+    # BASE_URL keeps bare ids, so state recorded before SOURCES existed stays valid
+    sources: List[Source] = [Source("base", "", primary)]
+    for i, (namespace, url, grid) in enumerate(extra, start=1):
+        # Views sharing a namespace need distinct names for logs and per-source stopping
+        name = namespace if not any(s.name == namespace for s in sources) else f"{namespace}#{i}"
+        sources.append(Source(name, namespace, EMarketplaceScraper(http_cache, url, grid or GRID_ID, budget)))
+        print(f"[main] Source {name}: {url}")
+    return SourceRegistry(sources)
+
+
+def build_state_repo() -> StateRepositoryPort:
+    if settings.state_backend == "json":
+        return JsonStateRepository()
+    repo = SqliteStateRepository()
+    migrated = migrate_json_state(STATE_PATH, repo)
+    if migrated:
+        print(f"[main] Migrated {migrated} listings from {STATE_PATH} into {repo.path}")
+    return repo
+
+
+def build_prefilter() -> Prefilter:
+    return Prefilter(
+        yes_threshold=settings.prefilter_yes_threshold,
+        no_threshold=settings.prefilter_no_threshold,
+        min_training=settings.prefilter_min_training,
+    )
+
+
+def build_classifier(state_repo: StateRepositoryPort) -> ClassifierPort:
+    openai_classifier = OpenAIClassifier(
+        batch_size=settings.classify_batch_size,
+        max_concurrency=settings.classify_concurrency,
+    )
+    classifier: ClassifierPort = openai_classifier
+    if settings.classifier_cache:
+        cache = ClassificationCache(
+            ttl_seconds=settings.classifier_cache_ttl_days * 86400,
+            max_entries=settings.classifier_cache_max_entries,
+        )
+        classifier = CachedClassifier(classifier, model=openai_classifier.model, prompt_version=PROMPT_VERSION, cache=cache)
+    if settings.prefilter:
+        classifier = PrefilterClassifier(classifier, build_prefilter(), load_training=lambda: state_repo.labelled_listings(source="llm"),
+                                         label_version=lambda: state_repo.label_version(source="llm"))
+    return classifier
+
+
+@asynccontextmanager
+async def build_service(notifier: NotifierPort) -> AsyncIterator[SyncService]:
+    """Build the scraper, state, classifier, journal and archive once; they are closed when the context exits."""
+    async with AsyncExitStack() as stack:
+        http_cache = HttpCache(max_bytes=settings.http_cache_max_mb * 1024 * 1024) if settings.http_cache else None
+        if http_cache is not None:
+            stack.callback(http_cache.close)
+        scraper = build_scraper(http_cache)
+        stack.push_async_callback(scraper.aclose)
+        state_repo = build_state_repo()
+        stack.callback(state_repo.close)
+        classifier = None
         try:
-            state_path = os.path.join(os.path.dirname(__file__), "..", "data", "state.json")
-            state_path = os.path.abspath(state_path)
-            if os.path.exists(state_path):
-                print(f"[main] RESET_STATE_ON_START is true; removing {state_path}")
-                os.remove(state_path)
+            classifier = build_classifier(state_repo)
+            stack.push_async_callback(classifier.aclose)
+            print("[main] OpenAI classifier initialized.")
         except Exception as e:
-            print(f"[main] Failed to reset state: {e}")
-    service = SyncService(scraper, notifier, state_repo, classifier)
-    await service.sync_once()
+            print(f"[main] OpenAI classifier not available: {e}")
+        journal = SqliteSyncJournal() if settings.sync_journal else None
+        if journal is not None:
+            stack.callback(journal.close)
+        archive = SqliteSnapshotArchive() if settings.archive else None
+        if archive is not None:
+            stack.callback(archive.close)
+        if settings.reset_state_on_start:
+            try:
+                print("[main] RESET_STATE_ON_START is true; clearing saved state")
+                state_repo.reset()
+                if journal is not None:
+                    journal.clear()
+            except Exception as e:
+                print(f"[main] Failed to reset state: {e}")
+        yield SyncService(scraper, notifier, state_repo, classifier, journal, archive)
+
+
+def build_interval() -> AdaptiveInterval:
+    return AdaptiveInterval(
+        base_s=settings.check_interval_minutes * 60,
+        min_s=settings.min_interval_minutes * 60,
+        max_s=settings.max_interval_minutes * 60,
+        business_hours=parse_business_hours(settings.business_hours),
+    )
 
 
 async def main():
-    await run_once()
+    # One Discord connection and one set of warm components for the life of the process
+    notifier = DiscordNotifier()
+    server = None
+    if metrics.enabled and settings.metrics_port > 0:
+        server = await serve_metrics(settings.metrics_host, settings.metrics_port)
+    try:
+        async with build_service(notifier) as service:
+            scheduler = AsyncIOScheduler()
+
+            def reschedule(seconds: float) -> None:
+                # The first run finishes before the job is added, which then uses the updated interval
+                if scheduler.get_job("sync") is not None:
+                    scheduler.reschedule_job("sync", trigger="interval", seconds=seconds)
 
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(run_once, "interval", minutes=settings.check_interval_minutes, id="sync")
-    scheduler.start()
+            runner = SyncRunner(service, build_interval(), on_interval_change=reschedule)
+            await runner.run()
 
-    while True:
-        await asyncio.sleep(3600)
+            # Never two runs at once; ticks missed while a run was going collapse into one
+            scheduler.add_job(
+                runner.run, "interval", seconds=runner.interval.seconds, id="sync",
+                max_instances=1, coalesce=True, misfire_grace_time=None,
+            )
+            scheduler.start()
+            try:
+                while True:
+                    await asyncio.sleep(3600)
+            finally:
+                scheduler.shutdown(wait=False)
+    finally:
+        if server is not None:
+            server.close()
+        await notifier.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""Check that the parallel pager walk finds exactly the listings a serial walk finds.
+
+Crawls the results pages twice and compares the listing ids and grid-row fields. The reference is a plain
+serial walk written independently of the pager's page selection: one ASP.NET session that always posts the
+next page number, found either in the numbered links or behind a "..." link. The other crawl is the parallel
+walk over CRAWL_SESSIONS sessions. Exits with status 1 on a mismatch.
+
+Usage:
+    CRAWL_SESSIONS=4 python -m src.tools.check_parallel_crawl
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, Set, Tuple
+from src.adapters.scraper.emarketplace_scraper import EMarketplaceScraper
+from src.domain.fingerprint import ROW_FIELDS
+from src.domain.models import Listing
+from src.infrastructure.config import settings
+
+
+async def _serial_walk(scraper: EMarketplaceScraper) -> Tuple[Dict[str, Listing], float]:
+    # Shares only the HTTP and parsing steps with the scraper, not parallel_pager's choice of pages
+    started = time.monotonic()
+    found: Dict[str, Listing] = {}
+    client, page = await scraper._open_session()
+    try:
+        visited: Set[int] = set()
+        while True:
+            visited.add(page.current_page)
+            for l in page.listings:
+                found.setdefault(l.id, l)
+            following = page.current_page + 1
+            if following in visited or following not in page.pager_pages | page.jump_pages:
+                break
+            page = await scraper._apostback_page(client, page.form_fields, following)
+            if page.current_page != following:
+                raise RuntimeError(f"asked for page {following} but got page {page.current_page}")
+    finally:
+        await client.aclose()
+    print(f"[check] Serial walk read {len(visited)} page(s)")
+    return found, time.monotonic() - started
+
+
+async def _parallel_walk(scraper: EMarketplaceScraper) -> Tuple[Dict[str, Listing], float]:
+    started = time.monotonic()
+    found: Dict[str, Listing] = {}
+    async for page in scraper.iter_listing_pages(full_sweep=True):
+        for l in page:
+            found.setdefault(l.id, l)
+    return found, time.monotonic() - started
+
+
+async def _check() -> bool:
+    scraper = EMarketplaceScraper()
+    try:
+        serial, serial_secs = await _serial_walk(scraper)
+        parallel, parallel_secs = await _parallel_walk(scraper)
+    finally:
+        await scraper.aclose()
+    print(f"[check] Serial walk: {len(serial)} listings in {serial_secs:.1f}s")
+    print(f"[check] Parallel walk ({settings.crawl_sessions} sessions): {len(parallel)} listings in {parallel_secs:.1f}s")
+
+    missing = sorted(serial.keys() - parallel.keys())
+    extra = sorted(parallel.keys() - serial.keys())
+    differing = sorted(
+        i for i in serial.keys() & parallel.keys()
+        if any(getattr(serial[i], f) != getattr(parallel[i], f) for f in ROW_FIELDS)
+    )
+    if missing:
+        print(f"[check] {len(missing)} listing(s) only in the serial walk: {missing[:10]}")
+    if extra:
+        print(f"[check] {len(extra)} listing(s) only in the parallel walk: {extra[:10]}")
+    if differing:
+        print(f"[check] {len(differing)} listing(s) with different row fields: {differing[:10]}")
+    ok = not (missing or extra or differing)
+    print("[check] OK: parallel walk matches the serial walk." if ok else "[check] MISMATCH")
+    return ok
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    sys.exit(0 if asyncio.run(_check()) else 1)
+
+
+if __name__ == "__main__":
+    main()
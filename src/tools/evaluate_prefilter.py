@@ -0,0 +1,31 @@
+"""Offline evaluation of the local pre-filter against past LLM labels stored in state.
+
+Usage:
+    python -m src.tools.evaluate_prefilter [--folds 5]
+"""
+import argparse
+from src.adapters.classifier.prefilter import evaluate
+from src.main import build_prefilter, build_state_repo
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folds", type=int, default=5)
+    args = parser.parse_args()
+
+    labelled = build_state_repo().labelled_listings(source="llm")
+    positives = sum(1 for l in labelled if l.relevant)
+    print(f"[prefilter] {len(labelled)} LLM-labelled listings ({positives} YES, {len(labelled) - positives} NO)")
+    if len(labelled) < args.folds:
+        print("[prefilter] Not enough labelled listings to evaluate.")
+        return
+    report = evaluate(labelled, build_prefilter(), folds=args.folds)
+    print(f"[prefilter] Decided locally: {int(report['decided_locally'])}/{int(report['examples'])} ({report['coverage']:.1%} of LLM calls saved)")
+    print(f"[prefilter] Local YES precision: {report['yes_precision']:.3f}")
+    print(f"[prefilter] Local NO precision:  {report['no_precision']:.3f}")
+    print(f"[prefilter] Recall of relevant listings (with LLM fallback): {report['recall']:.3f}")
+    print(f"[prefilter] Accuracy when decided locally: {report['accuracy_when_decided']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
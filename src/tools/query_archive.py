@@ -0,0 +1,71 @@
+"""Query the append-only history archive of listings.
+
+Usage:
+    python -m src.tools.query_archive --runs [N]
+    python -m src.tools.query_archive --as-of RUN_ID [--csv out.csv]
+    python -m src.tools.query_archive --history LISTING_ID
+"""
+import argparse
+import csv
+import time
+from src.adapters.state.snapshot_archive import ARCHIVED_FIELDS, SqliteSnapshotArchive
+
+
+def _when(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--runs", type=int, nargs="?", const=20, metavar="N", help="latest N runs (default 20)")
+    group.add_argument("--as-of", type=int, metavar="RUN_ID", help="listings as they stood after this run")
+    group.add_argument("--history", metavar="LISTING_ID", help="every archived version of one listing")
+    parser.add_argument("--csv", metavar="PATH", help="with --as-of, write the listings to a CSV file")
+    args = parser.parse_args()
+
+    archive = SqliteSnapshotArchive()
+    try:
+        if args.runs is not None:
+            runs = archive.runs(limit=args.runs)
+            for r in runs:
+                sweep = "full" if r.full_sweep else "incremental"
+                print(f"[archive] run {r.run_id} {_when(r.finished_at)} ({sweep}): +{r.added} ~{r.changed} -{r.removed}, {r.live} live")
+            print(f"[archive] {len(runs)} run(s) shown; archive is {archive.size_bytes() / (1024 * 1024):.1f} MiB")
+        elif args.as_of is not None:
+            started = time.monotonic()
+            listings = archive.as_of(args.as_of, with_descriptions=bool(args.csv))
+            print(f"[archive] {len(listings)} listing(s) live after run {args.as_of} (loaded in {time.monotonic() - started:.2f}s)")
+            if args.csv:
+                with open(args.csv, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(ARCHIVED_FIELDS)
+                    for l in sorted(listings, key=lambda l: l.id):
+                        writer.writerow([getattr(l, name) for name in ARCHIVED_FIELDS])
+                print(f"[archive] Wrote {args.csv}")
+            else:
+                for l in sorted(listings, key=lambda l: l.id):
+                    print(f"{l.id}\t{l.status}\t{l.title}")
+        else:
+            versions = archive.history(args.history)
+            if not versions:
+                print(f"[archive] No versions of {args.history} in the archive.")
+            previous = None
+            for i, (run_id, listing) in enumerate(versions):
+                if listing is None:
+                    print(f"[archive] run {run_id}: removed")
+                elif previous is None:
+                    print(f"[archive] run {run_id}: {'first seen' if i == 0 else 'listed again'}: {listing.title} ({listing.status})")
+                else:
+                    changed = [name for name in ARCHIVED_FIELDS if getattr(listing, name) != getattr(previous, name)]
+                    print(f"[archive] run {run_id}: changed {', '.join(changed) or 'nothing'}")
+                    for name in changed:
+                        if name != "description":
+                            print(f"    {name}: {getattr(previous, name)!r} -> {getattr(listing, name)!r}")
+                previous = listing
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()